@@ -1,90 +1,365 @@
 import os
+import io
 import json
+import gzip
+import zlib
 import uuid
+import secrets
+import hmac
+import hashlib
 import ipaddress
 import socket
+import shutil
 import sqlite3
+import threading
+import copy
+import operator
+import time
+import re
 from datetime import datetime
-from functools import wraps
-from urllib.parse import urlparse
+from http.cookiejar import DefaultCookiePolicy
+from functools import wraps, lru_cache, partial
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from urllib.parse import SplitResult, urlsplit, urlunsplit, urljoin, parse_qsl, urlencode
 import requests
-from PIL import Image
-import markdown
-import trafilatura
+from requests.adapters import HTTPAdapter
 import bleach
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash, send_file, make_response, after_this_request
+from flask import Flask, Response, render_template, request, jsonify, session, redirect, url_for, flash, send_file, make_response, g, has_app_context
+from flask.json.provider import DefaultJSONProvider
+from jinja2 import FileSystemBytecodeCache
 from markupsafe import Markup
-from werkzeug.utils import secure_filename
 
-# Blueprint integration reference for OpenAI
-# the newest OpenAI model is "gpt-5" which was released August 7, 2025.
-# do not change this unless explicitly requested by the user
-from openai import OpenAI
+# orjson is a declared dependency; the stdlib fallback only covers bare checkouts without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET")
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
-# Initialize OpenAI client if API key is available
-openai_client = None
-if os.environ.get('OPENAI_API_KEY'):
-    openai_client = OpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
+# Templates only change on deploy: don't stat them per render outside debug, and
+# share compiled bytecode between worker processes and restarts
+app.config['TEMPLATES_AUTO_RELOAD'] = os.environ.get('FLASK_DEBUG') == '1'
+if not app.config['TEMPLATES_AUTO_RELOAD']:
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
 
-# HTML sanitization configuration
-ALLOWED_TAGS = [
+# Shared pool for blocking network work so it runs under an overall deadline
+background_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='background')
+
+# CPU-bound image processing gets its own pool, one thread per core
+image_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 2, thread_name_prefix='image')
+
+# Wall-clock limit for fetching a URL to scrape (socket timeouts only bound each read)
+SCRAPE_FETCH_DEADLINE = 15
+
+# Amount of fetched HTML handed to trafilatura for extraction
+SCRAPE_EXTRACT_LIMIT = 1024 * 1024
+
+# How long resolved hostnames are reused. Safe because fetches connect to the
+# validated IP itself rather than resolving again
+DNS_CACHE_TTL = 60
+
+# Hostnames that failed to resolve are refused without a lookup for this long
+# (RFC 9520 suggests a short cap), so retries against a dead name fail fast
+DNS_NEGATIVE_TTL = 30
+DNS_NEGATIVE_LIMIT = 1024
+dns_failures = {}
+
+# How long scraped content and generated quizzes are reused for the same URL
+SCRAPE_CACHE_TTL = 3600
+SCRAPE_CACHE_LIMIT = 512
+scraped_texts = {}
+# Pending quiz jobs older than this are reported as finished with no questions
+QUIZ_JOB_TIMEOUT = 300
+
+# Quiz generation runs behind the scrape response on its own small pool so slow
+# OpenAI calls never starve page fetches; jobs are polled by id
+ai_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='ai')
+
+# Heavy libraries (PIL, reportlab, trafilatura, openai) are imported
+# inside the handlers that use them so workers that never render a certificate
+# or scrape a URL don't pay their import time and memory
+
+# ReportLab reads RL_* settings once when it loads; binary deflate streams skip the ASCII85 pass
+os.environ.setdefault('RL_useA85', '0')
+
+@lru_cache(maxsize=None)
+def get_openai_client():
+    """Create the OpenAI client on first use, or return None without an API key"""
+    if not os.environ.get('OPENAI_API_KEY'):
+        return None
+
+    # Blueprint integration reference for OpenAI
+    # the newest OpenAI model is "gpt-5" which was released August 7, 2025.
+    # do not change this unless explicitly requested by the user
+    from openai import OpenAI, DefaultHttpxClient
+    import httpx
+
+    # One long-lived client with a larger keep-alive pool for bursts of scrapes
+    return OpenAI(
+        api_key=os.environ.get('OPENAI_API_KEY'),
+        http_client=DefaultHttpxClient(
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+            timeout=30.0
+        )
+    )
+
+# HTML sanitization configuration; sets, since bleach only does membership tests
+ALLOWED_TAGS = frozenset([
     'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'ul', 'ol', 'li', 'a', 'strong', 'em', 'b', 'i',
     'code', 'pre', 'blockquote', 'img', 'table', 'tr', 'td', 'th', 'thead', 'tbody', 'hr', 'br',
     'div', 'span'
-]
+])
 
 ALLOWED_ATTRIBUTES = {
-    'a': ['href', 'title', 'rel'],
-    'img': ['src', 'alt', 'title', 'width', 'height'],
-    'table': ['class'],
-    'td': ['colspan', 'rowspan'],
-    'th': ['colspan', 'rowspan'],
-    'div': ['class'],
-    'span': ['class']
+    'a': frozenset(['href', 'title', 'rel']),
+    'img': frozenset(['src', 'alt', 'title', 'width', 'height']),
+    'table': frozenset(['class']),
+    'td': frozenset(['colspan', 'rowspan']),
+    'th': frozenset(['colspan', 'rowspan']),
+    'div': frozenset(['class']),
+    'span': frozenset(['class'])
 }
 
-ALLOWED_PROTOCOLS = ['http', 'https', 'mailto']
+ALLOWED_PROTOCOLS = frozenset(['http', 'https', 'mailto'])
+
+# Header customization values accepted by the config endpoint
+HEX_COLOR_PATTERN = re.compile(r'#[0-9A-Fa-f]{6}')
+REM_SIZE_PATTERN = re.compile(r'\d+(\.\d+)?rem')
+HEADER_COLOR_KEYS = ('title_color', 'nav_text_color', 'background_gradient_start',
+                     'background_gradient_middle', 'background_gradient_end')
+HEADER_SIZE_KEYS = ('title_size', 'nav_text_size')
+
+# URLs of images saved by admin_upload_image (content-hash name, never overwritten)
+UPLOADED_IMAGE_PATH_PATTERN = re.compile(r'/static/resources/[0-9a-f]{16}\.jpg')
+
+# JPEG segments that carry no metadata: (marker, first five payload bytes)
+JPEG_BARE_SEGMENTS = frozenset({('APP0', b'JFIF\x00'), ('APP14', b'Adobe')})
+
+# Image uploads accepted by admin_upload_image (matched on the lowercased extension)
+ALLOWED_IMAGE_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg', '.gif', '.webp'})
+
+# HTML-significant characters rejected in short free-text fields (emoji, certificate name)
+UNSAFE_TEXT_PATTERN = re.compile(r'[<>"\'&]')
+
+# SSRF blocklists used by is_safe_url
+BLOCKED_HOSTNAMES = frozenset({
+    'localhost', '127.0.0.1', '::1',
+    'metadata.google.internal',
+    '169.254.169.254',  # AWS/GCP metadata
+    '100.100.100.200',  # Alibaba metadata
+    '192.0.0.192',      # Oracle metadata
+})
+BLOCKED_IPS = frozenset({
+    '169.254.169.254',  # AWS/GCP metadata
+    '100.100.100.200',  # Alibaba metadata
+    '192.0.0.192',      # Oracle metadata
+    '::1',              # IPv6 localhost
+    'fd00:ec2::254',    # AWS IPv6 metadata
+})
+BLOCKED_IPV6_NETWORKS = (
+    (ipaddress.IPv6Network('fc00::/7'), 'IPv6 unique local addresses are not allowed'),
+    (ipaddress.IPv6Network('fec0::/10'), 'IPv6 site-local addresses are not allowed'),  # deprecated but still blocked
+)
+BLOCKED_PORTS = frozenset({22, 23, 25, 53, 135, 139, 445, 993, 995, 1433, 3306, 3389, 5432, 5984, 6379, 8080, 9200, 27017})
+
+def json_loads(data):
+    """Parse JSON from str or bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_dumps(obj):
+    """Serialize to a compact JSON string, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj, separators=(',', ':'))
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that routes jsonify and request.get_json through orjson"""
+
+    def dumps(self, obj, **kwargs):
+        # jsonify passes separators or indent=2; orjson handles both, other options fall back
+        options = {key: value for key, value in kwargs.items() if key != 'separators'}
+        indent = options.pop('indent', None)
+        if orjson is None or options or indent not in (None, 2):
+            return super().dumps(obj, **kwargs)
+        # Dates still go through Flask's default() so they serialize as before
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+app.json = OrjsonProvider(app)
+
+def add_rel_attributes(attrs, new=False):
+    """Linkify callback: add rel="noopener noreferrer" to links for security"""
+    attrs[None, 'rel'] = 'noopener noreferrer'
+    return attrs
+
+# bleach Cleaners aren't thread-safe, so each thread builds its own once
+_cleaner_local = threading.local()
+
+def get_html_cleaner():
+    """Return this thread's Cleaner: sanitize and linkify in a single html5lib pass"""
+    cleaner = getattr(_cleaner_local, 'cleaner', None)
+    if cleaner is None:
+        from bleach.linkifier import LinkifyFilter
+        cleaner = bleach.Cleaner(
+            tags=ALLOWED_TAGS,
+            attributes=ALLOWED_ATTRIBUTES,
+            protocols=ALLOWED_PROTOCOLS,
+            strip=True,
+            filters=[partial(LinkifyFilter, parse_email=True, callbacks=[add_rel_attributes])]
+        )
+        _cleaner_local.cleaner = cleaner
+    return cleaner
+
+# Anything that could be markup, an entity, something linkify would turn into a
+# link (domains, emails, schemes) or a character html5lib rewrites (CR, controls)
+NEEDS_HTML_PARSE_PATTERN = re.compile(r'[<&.@:\r\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]')
 
 def sanitize_html(content):
     """Sanitize HTML content to prevent XSS while allowing safe formatting"""
     if not content:
         return ""
 
-    # First clean with bleach
-    cleaned_content = bleach.clean(
-        content,
-        tags=ALLOWED_TAGS,
-        attributes=ALLOWED_ATTRIBUTES,
-        protocols=ALLOWED_PROTOCOLS,
-        strip=True
-    )
+    # Plain text only needs '>' escaped, so skip the html5lib parse
+    if not NEEDS_HTML_PARSE_PATTERN.search(content):
+        return content.replace('>', '&gt;')
 
-    # Add rel="noopener noreferrer" to external links for security
-    def add_rel_attributes(attrs, new=False):
-        attrs[None, 'rel'] = 'noopener noreferrer'
-        return attrs
+    # Linkify runs as a cleaner filter so the document is parsed once
+    return get_html_cleaner().clean(content)
 
-    cleaned_content = bleach.linkify(
-        cleaned_content,
-        parse_email=True,
-        callbacks=[add_rel_attributes]
-    )
+DATABASE_PATH = 'data/tutorial_platform.db'
+
+# In-process cache for data loaded from the database. Each entry is tagged with
+# the database file signature at load time, so writes made by other worker
+# processes invalidate it as well as writes made through this module.
+_data_cache = {}
+_data_cache_lock = threading.Lock()
 
-    return cleaned_content
+def _database_signature():
+    """Return a cheap fingerprint of the database file used for cache invalidation"""
+    # WAL commits land in the -wal file until a checkpoint, so stat both
+    signature = []
+    for path in (DATABASE_PATH, DATABASE_PATH + '-wal'):
+        try:
+            st = os.stat(path)
+        except OSError:
+            if path == DATABASE_PATH:
+                return None
+            continue
+        signature += (st.st_mtime_ns, st.st_size)
+    return tuple(signature)
+
+def _cached(name, loader):
+    """Return the cached result of loader(), reloading it when the database changes"""
+    # Memoize per request on flask.g so repeat lookups skip the stat calls
+    request_cache = g.setdefault('data_cache', {}) if has_app_context() else None
+    if request_cache is not None and name in request_cache:
+        return request_cache[name]
+
+    signature = _database_signature()
+    with _data_cache_lock:
+        entry = _data_cache.get(name)
+    if entry is not None and entry[0] == signature:
+        value = entry[1]
+    else:
+        value = loader()
+        with _data_cache_lock:
+            _data_cache[name] = (signature, value)
+
+    if request_cache is not None:
+        request_cache[name] = value
+    return value
+
+def invalidate_cache(*names):
+    """Drop cached entries after a write (all entries if no names are given)"""
+    with _data_cache_lock:
+        if not names:
+            _data_cache.clear()
+        for name in names:
+            _data_cache.pop(name, None)
+    if has_app_context():
+        request_cache = g.get('data_cache')
+        if request_cache is not None:
+            if not names:
+                request_cache.clear()
+            for name in names:
+                request_cache.pop(name, None)
+
+# Per-thread database connections. Opening a connection and replaying its PRAGMAs
+# on every call added up on the hot paths, so each thread keeps one open and
+# close() just hands it back
+_db_local = threading.local()
+
+class PooledConnection:
+    """Thread-local SQLite connection whose close() releases it instead of closing it"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self._conn.__enter__()
+
+    def __exit__(self, *exc_info):
+        return self._conn.__exit__(*exc_info)
+
+    def close(self):
+        # Discard anything left uncommitted, as closing the connection used to
+        if self._conn.in_transaction:
+            self._conn.rollback()
+
+def connect_db():
+    """Return this thread's pooled database connection, opening it on first use"""
+    pooled = getattr(_db_local, 'conn', None)
+    # A connection must never be shared with a forked child (e.g. gunicorn --preload)
+    if pooled is None or _db_local.pid != os.getpid():
+        # Wait up to 30s for the write lock instead of the default 5s
+        conn = sqlite3.connect(DATABASE_PATH, timeout=30)
+        conn.execute('PRAGMA foreign_keys=ON')
+        conn.execute('PRAGMA synchronous=NORMAL')  # Durable enough with WAL, far fewer fsyncs
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA mmap_size=268435456')
+        conn.execute('PRAGMA cache_size=-16384')
+        pooled = PooledConnection(conn)
+        _db_local.conn = pooled
+        _db_local.pid = os.getpid()
+    return pooled
+
+@app.teardown_request
+def release_db(exc):
+    """Make sure a request never leaves its thread's connection mid-transaction"""
+    pooled = getattr(_db_local, 'conn', None)
+    if pooled is not None and _db_local.pid == os.getpid():
+        pooled.close()
 
 # Database initialization
 def init_database():
     """Initialize SQLite database with required tables"""
     os.makedirs('data', exist_ok=True)
-    conn = sqlite3.connect('data/tutorial_platform.db')
+    conn = sqlite3.connect('data/tutorial_platform.db', timeout=30)
     cursor = conn.cursor()
 
+    # WAL: readers don't block behind a writer
+    cursor.execute('PRAGMA journal_mode=WAL')
+
+    # Take the write lock once so schema setup is a single commit
+    cursor.execute('BEGIN IMMEDIATE')
+
     # Create modules table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS modules (
@@ -98,6 +373,9 @@ def init_database():
         )
     ''')
 
+    # Matches load_courses' ORDER BY so listing modules is an index scan, not a sort
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_modules_order ON modules (order_num, created_at)')
+
     # Create module_content table for storing HTML content
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS module_content (
@@ -117,6 +395,16 @@ def init_database():
         )
     ''')
 
+    # Create quiz job table, so any worker can answer polls for a job another one runs
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS quiz_jobs (
+            id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            result TEXT,
+            created_at REAL NOT NULL
+        )
+    ''')
+
     # Create site configuration table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS site_config (
@@ -170,12 +458,12 @@ def init_database():
         ('margin_completion', 'INTEGER DEFAULT 300')    # New column
     ]
 
+    # Only add the columns that are missing
+    cursor.execute('PRAGMA table_info(certificate_templates)')
+    existing_columns = {row[1] for row in cursor.fetchall()}
     for column_name, column_def in new_columns:
-        try:
+        if column_name not in existing_columns:
             cursor.execute(f'ALTER TABLE certificate_templates ADD COLUMN {column_name} {column_def}')
-        except sqlite3.OperationalError:
-            # Column already exists, skip
-            pass
 
     conn.commit()
     conn.close()
@@ -189,7 +477,7 @@ def migrate_json_to_database():
     json_file_path = 'data/courses.json'
     
     # Check if database has any modules
-    conn = sqlite3.connect('data/tutorial_platform.db')
+    conn = connect_db()
     cursor = conn.cursor()
     cursor.execute('SELECT COUNT(*) FROM modules')
     module_count = cursor.fetchone()[0]
@@ -199,38 +487,77 @@ def migrate_json_to_database():
     if module_count == 0 and os.path.exists(json_file_path):
         try:
             with open(json_file_path, 'r', encoding='utf-8') as f:
-                json_data = json.load(f)
+                json_data = json_loads(f.read())
             
             if json_data.get('modules'):
                 print(f"Migrating {len(json_data['modules'])} modules from JSON to database...")
-                save_courses(json_data)
-                print("Migration completed successfully")
-                
-                # Also migrate module content files if they exist
+
+                # Read content files first so everything is written in one transaction
+                content_rows = []
                 for module in json_data['modules']:
                     module_id = module['id']
                     content_file_path = f'data/modules/{module_id}.html'
                     if os.path.exists(content_file_path):
                         try:
                             with open(content_file_path, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                            save_module_content(module_id, content)
-                            print(f"Migrated content for module {module_id}")
+                                content_rows.append((module_id, pack_module_content(f.read())))
                         except Exception as e:
                             print(f"Error migrating content for module {module_id}: {e}")
+
+                conn = connect_db()
+                cursor = conn.cursor()
+                try:
+                    with conn:
+                        _write_courses(cursor, json_data)
+                        cursor.executemany('''
+                            INSERT INTO module_content (module_id, content) VALUES (?, ?)
+                            ON CONFLICT(module_id) DO UPDATE SET content = excluded.content
+                        ''', content_rows)
+                finally:
+                    conn.close()
+                invalidate_cache('courses')
+                print(f"Migration completed successfully ({len(content_rows)} content files)")
         except Exception as e:
             print(f"Error migrating JSON data: {e}")
 
-# Run migration
-migrate_json_to_database()
-
 # JSON migration functions removed - all data now stored in database
 
 # Config migration removed - configuration now stored in database
 
+# Column order shared by every certificate template read and insert, so the
+# row <-> dict mapping lives in one place
+TEMPLATE_COLUMNS = (
+    'id', 'name', 'title', 'subtitle', 'header_text', 'footer_text', 'company_name', 'logo_url',
+    'signature_url', 'signature_name', 'signature_title',
+    'font_size_title', 'font_size_subtitle', 'font_size_module', 'font_size_date', 'font_size_header',
+    'font_size_footer', 'font_size_signature', 'font_size_completion',
+    'margin_top', 'margin_subtitle', 'margin_module', 'margin_date', 'margin_footer', 'margin_signature',
+    'margin_completion',
+    'logo_width', 'logo_height', 'signature_width', 'signature_height',
+    'background_color', 'text_color', 'is_default', 'created_at',
+)
+TEMPLATE_SELECT_SQL = f"SELECT {', '.join(TEMPLATE_COLUMNS)} FROM certificate_templates"
+TEMPLATE_INSERT_SQL = (f"INSERT INTO certificate_templates ({', '.join(TEMPLATE_COLUMNS)}) "
+                       f"VALUES ({', '.join('?' * len(TEMPLATE_COLUMNS))})")
+TEMPLATE_UPDATE_SQL = (f"UPDATE certificate_templates SET "
+                       f"{', '.join(f'{column} = ?' for column in TEMPLATE_COLUMNS[1:-1])} WHERE id = ?")
+
+# Optional text fields default to empty; the completion line postdates the
+# original schema, so older callers may not send it
+TEMPLATE_FIELD_DEFAULTS = {
+    'header_text': '', 'footer_text': '', 'company_name': '', 'logo_url': '',
+    'signature_url': '', 'signature_name': '', 'signature_title': '',
+    'font_size_completion': 20, 'margin_completion': 300, 'is_default': 0,
+}
+
+def _template_values(template_data):
+    """Map a template dict onto TEMPLATE_COLUMNS, minus id and created_at"""
+    return tuple(template_data[column] if column in template_data else TEMPLATE_FIELD_DEFAULTS[column]
+                 for column in TEMPLATE_COLUMNS[1:-1])
+
 def create_default_certificate_template():
     """Create default certificate template if none exists"""
-    conn = sqlite3.connect('data/tutorial_platform.db')
+    conn = connect_db()
     cursor = conn.cursor()
 
     # Check if default template exists
@@ -238,34 +565,23 @@ def create_default_certificate_template():
     if cursor.fetchone()[0] == 0:
         print("Creating default certificate template...")
 
-        template_id = str(uuid.uuid4())
-        cursor.execute('''
-            INSERT INTO certificate_templates (
-                id, name, title, subtitle, header_text, footer_text, company_name, logo_url, signature_url, signature_name, signature_title,
-                font_size_title, font_size_subtitle, font_size_module, font_size_date, font_size_header, font_size_footer, font_size_signature,
-                margin_top, margin_subtitle, margin_module, margin_date, margin_footer, margin_signature,
-                logo_width, logo_height, signature_width, signature_height, font_size_completion, margin_completion,
-                background_color, text_color, is_default, created_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            template_id,
-            'Default Certificate',
-            'Certificate of Completion',
-            'This certifies that {FULL NAME} have successfully completed:',
-            'Official Transcript', # Default header_text
-            'Congratulations on your achievement!', # Default footer_text
-            'Your Company', # Default company_name
-            '', # Default logo_url
-            '', # Default signature_url
-            '', # Default signature_name
-            '', # Default signature_title
-            24, 16, 20, 12, 14, 10, 12, # Font sizes
-            100, 200, 250, 350, 400, 420, # Margins
-            100, 50, 150, 40, 20, 300, # Logo and signature dimensions, completion settings
-            '#ffffff', '#000000',
-            1,
-            datetime.now().isoformat()
-        ))
+        template = {
+            'name': 'Default Certificate',
+            'title': 'Certificate of Completion',
+            'subtitle': 'This certifies that {FULL NAME} have successfully completed:',
+            'header_text': 'Official Transcript',
+            'footer_text': 'Congratulations on your achievement!',
+            'company_name': 'Your Company',
+            'font_size_title': 24, 'font_size_subtitle': 16, 'font_size_module': 20, 'font_size_date': 12,
+            'font_size_header': 14, 'font_size_footer': 10, 'font_size_signature': 12,
+            'margin_top': 100, 'margin_subtitle': 200, 'margin_module': 250, 'margin_date': 350,
+            'margin_footer': 400, 'margin_signature': 420,
+            'logo_width': 100, 'logo_height': 50, 'signature_width': 150, 'signature_height': 40,
+            'background_color': '#ffffff', 'text_color': '#000000',
+            'is_default': 1,
+        }
+        cursor.execute(TEMPLATE_INSERT_SQL,
+                       (uuid.uuid4().hex, *_template_values(template), datetime.now().isoformat()))
 
         print("Default certificate template created")
 
@@ -278,8 +594,17 @@ create_default_certificate_template()
 
 # Load configuration from database
 def load_config():
-    """Load configuration from SQLite database"""
-    conn = sqlite3.connect('data/tutorial_platform.db')
+    """Load configuration from SQLite database (cached until the database changes)"""
+    return copy.deepcopy(_cached('config', _query_config))
+
+def get_config():
+    """Return the cached configuration itself; callers must treat it as read-only"""
+    # Page renders only read the config, so they skip load_config's deep copy
+    return _cached('config', _query_config)
+
+def _query_config():
+    """Read and rebuild the nested configuration from the site_config table"""
+    conn = connect_db()
     cursor = conn.cursor()
 
     cursor.execute('SELECT key, value, data_type FROM site_config')
@@ -312,7 +637,7 @@ def load_config():
     for key, value, data_type in config_rows:
         if data_type == 'json':
             try:
-                parsed_value = json.loads(value)
+                parsed_value = json_loads(value)
             except json.JSONDecodeError:
                 parsed_value = value
         else:
@@ -330,311 +655,98 @@ def load_config():
     return config
 
 def save_config(config):
-    """Save configuration to SQLite database"""
-    conn = sqlite3.connect('data/tutorial_platform.db')
-    cursor = conn.cursor()
-
-    # Clear existing configuration
-    cursor.execute('DELETE FROM site_config')
-
-    # Flatten configuration and insert into database
-    def insert_config_recursive(prefix, data):
+    """Save configuration to SQLite database, writing only the keys that changed"""
+    # Flatten configuration into database rows
+    rows = {}
+    def flatten_config(prefix, data):
         for key, value in data.items():
             full_key = f"{prefix}.{key}" if prefix else key
             if isinstance(value, dict):
-                insert_config_recursive(full_key, value)
+                flatten_config(full_key, value)
+            elif isinstance(value, str):
+                rows[full_key] = (value, 'string')
             else:
-                cursor.execute(
-                    'INSERT INTO site_config (key, value, data_type) VALUES (?, ?, ?)',
-                    (full_key, json.dumps(value) if not isinstance(value, str) else value,
-                     'json' if not isinstance(value, str) else 'string')
-                )
+                rows[full_key] = (json_dumps(value), 'json')
 
-    insert_config_recursive('', config)
+    flatten_config('', config)
 
-    conn.commit()
-    conn.close()
+    conn = connect_db()
+    try:
+        # Write only the rows that changed, in one transaction
+        with conn:
+            existing = {key: (value, data_type) for key, value, data_type in
+                        conn.execute('SELECT key, value, data_type FROM site_config')}
+            removed = [(key,) for key in existing.keys() - rows.keys()]
+            changed = [(key, value, data_type) for key, (value, data_type) in rows.items()
+                       if existing.get(key) != (value, data_type)]
+
+            conn.executemany('DELETE FROM site_config WHERE key = ?', removed)
+            conn.executemany('''
+                INSERT INTO site_config (key, value, data_type) VALUES (?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET value = excluded.value, data_type = excluded.data_type
+            ''', changed)
+    finally:
+        conn.close()
+    invalidate_cache('config')
 
 # Certificate template management functions
-def get_certificate_templates():
-    """Get all certificate templates from database"""
-    conn = sqlite3.connect('data/tutorial_platform.db')
+def _query_certificate_templates():
+    """Read every certificate template once; the table holds a handful of rows"""
+    conn = connect_db()
     cursor = conn.cursor()
+    cursor.execute(f'{TEMPLATE_SELECT_SQL} ORDER BY is_default DESC, name ASC')
+    templates = [dict(zip(TEMPLATE_COLUMNS, row)) for row in cursor.fetchall()]
+    conn.close()
 
-    cursor.execute('''
-        SELECT id, name, title, subtitle, header_text, footer_text, company_name, logo_url, signature_url, signature_name, signature_title,
-               font_size_title, font_size_subtitle, font_size_module, font_size_date, font_size_header, font_size_footer, font_size_signature, font_size_completion,
-               margin_top, margin_subtitle, margin_module, margin_date, margin_footer, margin_signature, margin_completion,
-               logo_width, logo_height, signature_width, signature_height, background_color, text_color, is_default, created_at
-        FROM certificate_templates ORDER BY is_default DESC, name ASC
-    ''')
-
-    templates = []
-    for row in cursor.fetchall():
-        template = {
-            'id': row[0],
-            'name': row[1],
-            'title': row[2],
-            'subtitle': row[3],
-            'header_text': row[4],
-            'footer_text': row[5],
-            'company_name': row[6],
-            'logo_url': row[7],
-            'signature_url': row[8],
-            'signature_name': row[9],
-            'signature_title': row[10],
-            'font_size_title': row[11],
-            'font_size_subtitle': row[12],
-            'font_size_module': row[13],
-            'font_size_date': row[14],
-            'font_size_header': row[15],
-            'font_size_footer': row[16],
-            'font_size_signature': row[17],
-            'font_size_completion': row[18],
-            'margin_top': row[19],
-            'margin_subtitle': row[20],
-            'margin_module': row[21],
-            'margin_date': row[22],
-            'margin_footer': row[23],
-            'margin_signature': row[24],
-            'margin_completion': row[25],
-            'logo_width': row[26],
-            'logo_height': row[27],
-            'signature_width': row[28],
-            'signature_height': row[29],
-            'background_color': row[30],
-            'text_color': row[31],
-            'is_default': row[32],
-            'created_at': row[33]
-        }
-        templates.append(template)
+    return {
+        'templates': templates,
+        'by_id': {template['id']: template for template in templates},
+        'default': next((template for template in templates if template['is_default'] == 1), None),
+    }
 
-    conn.close()
-    return templates
+def get_certificate_templates():
+    """Get all certificate templates (cached until the database changes)"""
+    return [dict(template) for template in _cached('certificate_templates', _query_certificate_templates)['templates']]
 
 def get_certificate_template(template_id):
     """Get a specific certificate template by ID"""
-    conn = sqlite3.connect('data/tutorial_platform.db')
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        SELECT id, name, title, subtitle, header_text, footer_text, company_name, logo_url, signature_url, signature_name, signature_title,
-               font_size_title, font_size_subtitle, font_size_module, font_size_date, font_size_header, font_size_footer, font_size_signature, font_size_completion,
-               margin_top, margin_subtitle, margin_module, margin_date, margin_footer, margin_signature, margin_completion,
-               logo_width, logo_height, signature_width, signature_height, background_color, text_color, is_default, created_at
-        FROM certificate_templates WHERE id = ?
-    ''', (template_id,))
-
-    row = cursor.fetchone()
-    conn.close()
-
-    if not row:
-        return None
-
-    return {
-        'id': row[0],
-        'name': row[1],
-        'title': row[2],
-        'subtitle': row[3],
-        'header_text': row[4],
-        'footer_text': row[5],
-        'company_name': row[6],
-        'logo_url': row[7],
-        'signature_url': row[8],
-        'signature_name': row[9],
-        'signature_title': row[10],
-        'font_size_title': row[11],
-        'font_size_subtitle': row[12],
-        'font_size_module': row[13],
-        'font_size_date': row[14],
-        'font_size_header': row[15],
-        'font_size_footer': row[16],
-        'font_size_signature': row[17],
-        'font_size_completion': row[18],
-        'margin_top': row[19],
-        'margin_subtitle': row[20],
-        'margin_module': row[21],
-        'margin_date': row[22],
-        'margin_footer': row[23],
-        'margin_signature': row[24],
-        'margin_completion': row[25],
-        'logo_width': row[26],
-        'logo_height': row[27],
-        'signature_width': row[28],
-        'signature_height': row[29],
-        'background_color': row[30],
-        'text_color': row[31],
-        'is_default': row[32],
-        'created_at': row[33]
-    }
+    template = _cached('certificate_templates', _query_certificate_templates)['by_id'].get(template_id)
+    return dict(template) if template else None
 
 def get_default_certificate_template():
     """Get the default certificate template"""
-    conn = sqlite3.connect('data/tutorial_platform.db')
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        SELECT id, name, title, subtitle, header_text, footer_text, company_name, logo_url, signature_url, signature_name, signature_title,
-               font_size_title, font_size_subtitle, font_size_module, font_size_date, font_size_header, font_size_footer, font_size_signature, font_size_completion,
-               margin_top, margin_subtitle, margin_module, margin_date, margin_footer, margin_signature, margin_completion,
-               logo_width, logo_height, signature_width, signature_height, background_color, text_color, is_default, created_at
-        FROM certificate_templates WHERE is_default = 1 LIMIT 1
-    ''')
-
-    row = cursor.fetchone()
-    conn.close()
-
-    if not row:
-        return None
-
-    return {
-        'id': row[0],
-        'name': row[1],
-        'title': row[2],
-        'subtitle': row[3],
-        'header_text': row[4],
-        'footer_text': row[5],
-        'company_name': row[6],
-        'logo_url': row[7],
-        'signature_url': row[8],
-        'signature_name': row[9],
-        'signature_title': row[10],
-        'font_size_title': row[11],
-        'font_size_subtitle': row[12],
-        'font_size_module': row[13],
-        'font_size_date': row[14],
-        'font_size_header': row[15],
-        'font_size_footer': row[16],
-        'font_size_signature': row[17],
-        'font_size_completion': row[18],
-        'margin_top': row[19],
-        'margin_subtitle': row[20],
-        'margin_module': row[21],
-        'margin_date': row[22],
-        'margin_footer': row[23],
-        'margin_signature': row[24],
-        'margin_completion': row[25],
-        'logo_width': row[26],
-        'logo_height': row[27],
-        'signature_width': row[28],
-        'signature_height': row[29],
-        'background_color': row[30],
-        'text_color': row[31],
-        'is_default': row[32],
-        'created_at': row[33]
-    }
+    # Every certificate download asks for this; it's a dict lookup on a warm cache
+    template = _cached('certificate_templates', _query_certificate_templates)['default']
+    return dict(template) if template else None
 
 def save_certificate_template(template_data):
     """Save or update a certificate template"""
-    conn = sqlite3.connect('data/tutorial_platform.db')
+    conn = connect_db()
     cursor = conn.cursor()
 
-    # If this is set as default, unset all other defaults
-    if template_data.get('is_default'):
-        cursor.execute('UPDATE certificate_templates SET is_default = 0')
-
-    if template_data.get('id'):
-        # Update existing template
-        cursor.execute('''
-            UPDATE certificate_templates SET
-                name = ?, title = ?, subtitle = ?, header_text = ?, footer_text = ?, company_name = ?, logo_url = ?, signature_url = ?, signature_name = ?, signature_title = ?,
-                font_size_title = ?, font_size_subtitle = ?, font_size_module = ?, font_size_date = ?, font_size_header = ?, font_size_footer = ?, font_size_signature = ?,
-                margin_top = ?, margin_subtitle = ?, margin_module = ?, margin_date = ?, margin_footer = ?, margin_signature = ?,
-                logo_width = ?, logo_height = ?, signature_width = ?, signature_height = ?,
-                background_color = ?, text_color = ?, is_default = ?,
-                font_size_completion = ?, margin_completion = ?
-            WHERE id = ?
-        ''', (
-            template_data['name'],
-            template_data['title'],
-            template_data['subtitle'],
-            template_data.get('header_text', ''),
-            template_data.get('footer_text', ''),
-            template_data.get('company_name', ''),
-            template_data.get('logo_url', ''),
-            template_data.get('signature_url', ''),
-            template_data.get('signature_name', ''),
-            template_data.get('signature_title', ''),
-            template_data['font_size_title'],
-            template_data['font_size_subtitle'],
-            template_data['font_size_module'],
-            template_data['font_size_date'],
-            template_data['font_size_header'],
-            template_data['font_size_footer'],
-            template_data['font_size_signature'],
-            template_data['margin_top'],
-            template_data['margin_subtitle'],
-            template_data['margin_module'],
-            template_data['margin_date'],
-            template_data['margin_footer'],
-            template_data['margin_signature'],
-            template_data['logo_width'],
-            template_data['logo_height'],
-            template_data['signature_width'],
-            template_data['signature_height'],
-            template_data['background_color'],
-            template_data['text_color'],
-            template_data.get('is_default', 0),
-            template_data.get('font_size_completion', 20),
-            template_data.get('margin_completion', 300),
-            template_data['id']
-        ))
-    else:
-        # Create new template
-        template_id = str(uuid.uuid4())
-        cursor.execute('''
-            INSERT INTO certificate_templates (
-                id, name, title, subtitle, header_text, footer_text, company_name, logo_url, signature_url, signature_name, signature_title,
-                font_size_title, font_size_subtitle, font_size_module, font_size_date, font_size_header, font_size_footer, font_size_signature,
-                margin_top, margin_subtitle, margin_module, margin_date, margin_footer, margin_signature,
-                logo_width, logo_height, signature_width, signature_height, font_size_completion, margin_completion,
-                background_color, text_color, is_default, created_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            template_id,
-            template_data['name'],
-            template_data['title'],
-            template_data['subtitle'],
-            template_data.get('header_text', ''),
-            template_data.get('footer_text', ''),
-            template_data.get('company_name', ''),
-            template_data.get('logo_url', ''),
-            template_data.get('signature_url', ''),
-            template_data.get('signature_name', ''),
-            template_data.get('signature_title', ''),
-            template_data['font_size_title'],
-            template_data['font_size_subtitle'],
-            template_data['font_size_module'],
-            template_data['font_size_date'],
-            template_data['font_size_header'],
-            template_data['font_size_footer'],
-            template_data['font_size_signature'],
-            template_data['margin_top'],
-            template_data['margin_subtitle'],
-            template_data['margin_module'],
-            template_data['margin_date'],
-            template_data['margin_footer'],
-            template_data['margin_signature'],
-            template_data['logo_width'],
-            template_data['logo_height'],
-            template_data['signature_width'],
-            template_data['signature_height'],
-            template_data.get('font_size_completion', 20),
-            template_data.get('margin_completion', 300),
-            template_data['background_color'],
-            template_data['text_color'],
-            template_data.get('is_default', 0),
-            datetime.now().isoformat()
-        ))
-        template_data['id'] = template_id
-
-    conn.commit()
-    conn.close()
+    try:
+        with conn:
+            # If this is set as default, unset all other defaults
+            if template_data.get('is_default'):
+                cursor.execute('UPDATE certificate_templates SET is_default = 0')
+
+            if template_data.get('id'):
+                # Update existing template
+                cursor.execute(TEMPLATE_UPDATE_SQL, (*_template_values(template_data), template_data['id']))
+            else:
+                # Create new template
+                template_id = uuid.uuid4().hex
+                cursor.execute(TEMPLATE_INSERT_SQL,
+                               (template_id, *_template_values(template_data), datetime.now().isoformat()))
+                template_data['id'] = template_id
+    finally:
+        conn.close()
+    invalidate_cache('certificate_templates')
     return template_data['id']
 
 def delete_certificate_template(template_id):
     """Delete a certificate template"""
-    conn = sqlite3.connect('data/tutorial_platform.db')
+    conn = connect_db()
     cursor = conn.cursor()
 
     # Don't allow deleting the default template
@@ -649,105 +761,108 @@ def delete_certificate_template(template_id):
 
     conn.commit()
     conn.close()
+    invalidate_cache('certificate_templates')
     return True, "Template deleted successfully"
 
 # Load courses data from SQLite
 def load_courses():
-    """Load courses from SQLite database"""
+    """Load courses from SQLite database (cached until the database changes)"""
     try:
-        conn = sqlite3.connect('data/tutorial_platform.db')
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            SELECT id, title, description, video_url, created_at, order_num, quiz_data
-            FROM modules ORDER BY order_num, created_at
-        ''')
+        courses = _cached('courses', _query_courses)
+    except Exception as e:
+        print(f"Error loading courses from database: {e}")
+        # Return empty structure if database error
+        return {"modules": []}
 
-        modules = []
-        rows = cursor.fetchall()
-        print(f"Database query returned {len(rows)} modules")
-        
-        for row in rows:
-            module = {
-                'id': row[0],
-                'title': row[1],
-                'description': row[2] or '',
-                'video_url': row[3] or '',
-                'created_at': row[4],
-                'order': row[5]
-            }
+    # Hand out per-module copies so callers can modify them without touching the cache
+    return {"modules": [dict(module) for module in courses['modules']]}
 
-            # Parse quiz data if it exists
-            if row[6]:
-                try:
-                    module['quiz'] = json.loads(row[6])
-                except json.JSONDecodeError:
-                    print(f"Warning: Invalid quiz data for module {module['id']}")
+def get_module(module_id):
+    """Look up a single module by ID using the cached id index"""
+    # IDs can come from JSON bodies; a list or dict would raise in the dict lookup
+    if not isinstance(module_id, str):
+        return None
+    try:
+        courses = _cached('courses', _query_courses)
+    except Exception as e:
+        print(f"Error loading courses from database: {e}")
+        return None
 
-            modules.append(module)
+    module = courses['by_id'].get(module_id)
+    return dict(module) if module else None
 
-        conn.close()
-        print(f"Successfully loaded {len(modules)} modules from database")
-        return {"modules": modules}
-        
+def get_answer_key(module_id):
+    """Return the cached tuple of correct answers for a module's quiz, or None"""
+    if not isinstance(module_id, str):
+        return None
+    try:
+        courses = _cached('courses', _query_courses)
     except Exception as e:
         print(f"Error loading courses from database: {e}")
-        # Return empty structure if database error
-        return {"modules": []}
+        return None
 
-def save_courses(data):
-    """Save courses to SQLite database - safer update approach"""
-    conn = sqlite3.connect('data/tutorial_platform.db')
-    conn.execute('PRAGMA foreign_keys=ON')  # Enable foreign key constraints
+    return courses['answer_keys'].get(module_id)
+
+def _query_courses():
+    """Read all modules from the database, ordered for display"""
+    conn = connect_db()
     cursor = conn.cursor()
 
-    # Get existing module IDs
-    cursor.execute('SELECT id FROM modules')
-    existing_ids = set(row[0] for row in cursor.fetchall())
+    cursor.execute('''
+        SELECT id, title, description, video_url, created_at, order_num, quiz_data
+        FROM modules ORDER BY order_num, created_at
+    ''')
 
-    # Get new module IDs
-    new_ids = set(module['id'] for module in data.get('modules', []))
+    modules = []
+    rows = cursor.fetchall()
+    print(f"Database query returned {len(rows)} modules")
 
-    # Delete modules that are no longer present
-    for module_id in existing_ids - new_ids:
-        cursor.execute('DELETE FROM modules WHERE id = ?', (module_id,))
+    for row in rows:
+        module = {
+            'id': row[0],
+            'title': row[1],
+            'description': row[2] or '',
+            'video_url': row[3] or '',
+            'created_at': row[4],
+            'order': row[5]
+        }
 
-    # Update or insert modules
-    for module in data.get('modules', []):
-        quiz_data = None
-        if 'quiz' in module:
-            quiz_data = json.dumps(module['quiz'])
+        # Parse quiz data if it exists
+        if row[6]:
+            try:
+                module['quiz'] = json_loads(row[6])
+            except json.JSONDecodeError:
+                print(f"Warning: Invalid quiz data for module {module['id']}")
 
-        cursor.execute('''
-            INSERT OR REPLACE INTO modules (id, title, description, video_url, created_at, order_num, quiz_data)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            module['id'],
-            module['title'],
-            module.get('description', ''),
-            module.get('video_url', ''),
-            module['created_at'],
-            module.get('order', 0),
-            quiz_data
-        ))
+        modules.append(module)
 
-    conn.commit()
     conn.close()
+    print(f"Successfully loaded {len(modules)} modules from database")
 
-def update_module_in_db(module):
-    """Update a single module in the database"""
-    conn = sqlite3.connect('data/tutorial_platform.db')
-    conn.execute('PRAGMA foreign_keys=ON')
-    cursor = conn.cursor()
-
+    # Flat answer keys per quiz, built once per load for grading
+    answer_keys = {
+        module['id']: tuple(answer_token(question.get('correct_answer')) for question in module['quiz'].get('questions', []))
+        for module in modules if module.get('quiz')
+    }
+    return {"modules": modules, "by_id": {module['id']: module for module in modules}, "answer_keys": answer_keys}
+
+# Upsert rather than INSERT OR REPLACE: REPLACE deletes the old row first,
+# which cascades to (and wipes) the module's stored content
+MODULE_UPSERT_SQL = '''
+    INSERT INTO modules (id, title, description, video_url, created_at, order_num, quiz_data)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        title = excluded.title, description = excluded.description, video_url = excluded.video_url,
+        created_at = excluded.created_at, order_num = excluded.order_num, quiz_data = excluded.quiz_data
+'''
+
+def _module_row(module):
+    """Map a module dict onto the modules table columns"""
     quiz_data = None
     if 'quiz' in module:
-        quiz_data = json.dumps(module['quiz'])
+        quiz_data = json_dumps(module['quiz'])
 
-    cursor.execute('''
-        INSERT OR REPLACE INTO modules (id, title, description, video_url, created_at, order_num, quiz_data)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', (
+    return (
         module['id'],
         module['title'],
         module.get('description', ''),
@@ -755,96 +870,181 @@ def update_module_in_db(module):
         module['created_at'],
         module.get('order', 0),
         quiz_data
-    ))
+    )
+
+def save_courses(data):
+    """Save courses to SQLite database in a single transaction"""
+    conn = connect_db()
+    cursor = conn.cursor()
+
+    try:
+        with conn:
+            _write_courses(cursor, data)
+    finally:
+        conn.close()
+    invalidate_cache('courses')
+
+def _write_courses(cursor, data):
+    """Apply a full courses snapshot inside the caller's transaction"""
+    modules = data.get('modules', [])
+
+    # Get existing module IDs
+    cursor.execute('SELECT id FROM modules')
+    existing_ids = set(row[0] for row in cursor.fetchall())
+
+    # Get new module IDs
+    new_ids = set(module['id'] for module in modules)
+
+    # Delete removed modules, then upsert the rest, each as one batched statement
+    cursor.executemany('DELETE FROM modules WHERE id = ?', [(module_id,) for module_id in existing_ids - new_ids])
+    cursor.executemany(MODULE_UPSERT_SQL, [_module_row(module) for module in modules])
+
+def update_module_in_db(module):
+    """Update a single module in the database"""
+    conn = connect_db()
+    cursor = conn.cursor()
+
+    cursor.execute(MODULE_UPSERT_SQL, _module_row(module))
 
     conn.commit()
     conn.close()
+    invalidate_cache('courses')
+
+def delete_module_from_db(module_id):
+    """Delete a single module; its content goes with it via ON DELETE CASCADE"""
+    conn = connect_db()
+    try:
+        with conn:
+            conn.execute('DELETE FROM modules WHERE id = ?', (module_id,))
+    finally:
+        conn.close()
+    invalidate_cache('courses')
+
+# Content at least this long is stored zlib-compressed as a BLOB; tutorial HTML
+# typically shrinks 3-5x, so fewer pages move through SQLite on cold reads
+CONTENT_COMPRESS_MIN = 1024
+
+def pack_module_content(content):
+    """Encode module HTML for storage (compressed BLOB, or plain TEXT when short)"""
+    if content and len(content) >= CONTENT_COMPRESS_MIN:
+        return zlib.compress(content.encode('utf-8'), 6)
+    return content
+
+def unpack_module_content(value):
+    """Decode a stored module_content value; rows written as TEXT pass through"""
+    if isinstance(value, bytes):
+        return zlib.decompress(value).decode('utf-8')
+    return value
+
+@lru_cache(maxsize=1)
+def module_content_has_timestamps():
+    """Whether module_content has the timestamp columns (databases predating them don't)"""
+    # The schema doesn't change while the app runs, so look once per process
+    conn = connect_db()
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(module_content)")
+    columns = {column[1] for column in cursor.fetchall()}
+    conn.close()
+    return 'created_at' in columns and 'updated_at' in columns
 
 def save_module_content(module_id, content):
     """Save module content to database with backward-compatible timestamps"""
+    stored = pack_module_content(content)
     conn = None
     try:
-        conn = sqlite3.connect('data/tutorial_platform.db')
-        conn.execute('PRAGMA foreign_keys=ON')  # Enable foreign key constraints
+        conn = connect_db()
         cursor = conn.cursor()
 
-        # Check if the table has timestamp columns
-        cursor.execute("PRAGMA table_info(module_content)")
-        columns = [column[1] for column in cursor.fetchall()]
-        has_timestamps = 'created_at' in columns and 'updated_at' in columns
-
-        # Check if content already exists
-        cursor.execute('SELECT content FROM module_content WHERE module_id = ?', (module_id,))
-        existing = cursor.fetchone()
-
-        current_time = datetime.now().isoformat()
-
-        if existing:
-            # Update existing content
-            if has_timestamps:
-                cursor.execute('''
-                    UPDATE module_content
-                    SET content = ?, updated_at = ?
-                    WHERE module_id = ?
-                ''', (content, current_time, module_id))
-            else:
-                cursor.execute('''
-                    UPDATE module_content
-                    SET content = ?
-                    WHERE module_id = ?
-                ''', (content, module_id))
+        # One upsert instead of an existence check followed by UPDATE or INSERT
+        if module_content_has_timestamps():
+            current_time = datetime.now().isoformat()
+            cursor.execute('''
+                INSERT INTO module_content (module_id, content, created_at, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(module_id) DO UPDATE SET content = excluded.content, updated_at = excluded.updated_at
+            ''', (module_id, stored, current_time, current_time))
         else:
-            # Insert new content
-            if has_timestamps:
-                cursor.execute('''
-                    INSERT INTO module_content (module_id, content, created_at, updated_at)
-                    VALUES (?, ?, ?, ?)
-                ''', (module_id, content, current_time, current_time))
-            else:
-                cursor.execute('''
-                    INSERT INTO module_content (module_id, content)
-                    VALUES (?, ?)
-                ''', (module_id, content))
+            cursor.execute('''
+                INSERT INTO module_content (module_id, content)
+                VALUES (?, ?)
+                ON CONFLICT(module_id) DO UPDATE SET content = excluded.content
+            ''', (module_id, stored))
 
         conn.commit()
     finally:
         if conn:
             conn.close()
+    _sanitized_module_content.cache_clear()
 
 def load_module_content(module_id):
-    """Load module content from database with legacy file migration"""
+    """Load module content from database"""
     conn = None
     try:
-        conn = sqlite3.connect('data/tutorial_platform.db')
-        conn.execute('PRAGMA foreign_keys=ON')  # Enable foreign key constraints
+        conn = connect_db()
         cursor = conn.cursor()
 
         cursor.execute('SELECT content FROM module_content WHERE module_id = ?', (module_id,))
         result = cursor.fetchone()
 
         if result:
-            return result[0]
-
-        # Check for legacy HTML file and migrate it
-        legacy_file_path = f'data/modules/{module_id}.html'
-        if os.path.exists(legacy_file_path):
-            try:
-                with open(legacy_file_path, 'r', encoding='utf-8') as f:
-                    legacy_content = f.read()
-
-                # Save legacy content to database
-                save_module_content(module_id, legacy_content)
-
-                # Return the migrated content
-                return legacy_content
-            except Exception as e:
-                print(f"Error migrating legacy content for module {module_id}: {e}")
+            return unpack_module_content(result[0])
 
         return None
     finally:
         if conn:
             conn.close()
 
+@lru_cache(maxsize=256)
+def _sanitized_module_content(module_id, signature):
+    """Load and sanitize module content for a given database signature"""
+    raw_content = load_module_content(module_id)
+    if raw_content:
+        return Markup(sanitize_html(raw_content))
+    return Markup("<p>No content available for this module.</p>")
+
+def render_module_content(module_id):
+    """Return sanitized module content as Markup, served from a bounded LRU"""
+    # Entries are keyed on the database signature; the LRU bound drops stale ones
+    return _sanitized_module_content(module_id, _database_signature())
+
+def migrate_legacy_module_files():
+    """Import data/modules/<id>.html for existing modules that have no stored content"""
+    # Run once at startup; the legacy files are kept for the export
+    legacy_dir = 'data/modules'
+    if not os.path.isdir(legacy_dir):
+        return
+
+    conn = connect_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''
+            SELECT id FROM modules
+            WHERE NOT EXISTS (SELECT 1 FROM module_content WHERE module_id = modules.id)
+        ''')
+        missing = {row[0] for row in cursor.fetchall()}
+
+        content_rows = []
+        with os.scandir(legacy_dir) as entries:
+            for entry in entries:
+                module_id, ext = os.path.splitext(entry.name)
+                if ext == '.html' and module_id in missing and entry.is_file():
+                    try:
+                        with open(entry.path, 'r', encoding='utf-8') as f:
+                            content_rows.append((module_id, pack_module_content(f.read())))
+                    except Exception as e:
+                        print(f"Error migrating legacy content for module {module_id}: {e}")
+
+        if content_rows:
+            with conn:
+                cursor.executemany('INSERT INTO module_content (module_id, content) VALUES (?, ?)', content_rows)
+            print(f"Migrated legacy content for {len(content_rows)} modules")
+    finally:
+        conn.close()
+
+# Run migration (after the save helpers above are defined)
+migrate_json_to_database()
+migrate_legacy_module_files()
+
 # Progress, notes, and bookmarks functionality removed
 
 # Admin authentication decorator
@@ -856,78 +1056,194 @@ def require_admin(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# Rendered page cache for anonymous visitors
+def cache_anonymous_page(f):
+    """Serve repeat anonymous page views from memory until the database changes"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        # Only cache visitors without a session; debug mode skips the cache
+        if session or app.debug:
+            return f(*args, **kwargs)
+
+        key = ('page', request.path)
+        signature = _database_signature()
+        with _data_cache_lock:
+            entry = _data_cache.get(key)
+        if entry is not None and entry[0] == signature:
+            body, headers = entry[1]
+            g.page_signature = signature
+            return app.response_class(body, headers=headers)
+
+        response = make_response(f(*args, **kwargs))
+        if response.status_code == 200 and not session:
+            with _data_cache_lock:
+                _data_cache[key] = (signature, (response.get_data(), list(response.headers)))
+            g.page_signature = signature
+        return response
+    return decorated_function
+
 # Generate CSRF token
 def generate_csrf_token():
     if 'csrf_token' not in session:
-        session['csrf_token'] = str(uuid.uuid4())
+        session['csrf_token'] = secrets.token_urlsafe(24)
     return session['csrf_token']
 
-app.jinja_env.globals.update(csrf_token=generate_csrf_token)
+def get_csrf_token():
+    """Return the session's CSRF token without creating one"""
+    # Read-only so page views don't re-sign the session cookie
+    return session.get('csrf_token', '')
+
+app.jinja_env.globals.update(csrf_token=get_csrf_token)
+
+# Global no-cache policy for all content; views don't need to set these themselves
+NO_CACHE_HEADERS = {
+    'Cache-Control': 'no-cache, no-store, must-revalidate',
+    'Pragma': 'no-cache',
+    'Expires': '0',
+    'Last-Modified': '0',
+    'ETag': '',
+}
 
-# Global no-cache policy for all content
 @app.after_request
 def add_no_cache_headers(response):
     """Add no-cache headers to all responses to ensure fresh content loading"""
-    # Add no-cache headers to ALL responses (HTML, JSON, CSS, JS, images)
-    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    response.headers['Pragma'] = 'no-cache' 
-    response.headers['Expires'] = '0'
-    response.headers['Last-Modified'] = '0'
-    response.headers['ETag'] = ''
+    # Uploaded images are named by content hash and never rewritten
+    if UPLOADED_IMAGE_PATH_PATTERN.fullmatch(request.path):
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
+
+    # Add no-cache headers to ALL other responses (HTML, JSON, CSS, JS, images)
+    response.headers.update(NO_CACHE_HEADERS)
+    return response
+
+# Compress text responses (pages, JSON, CSS/JS) for clients that accept gzip
+COMPRESSIBLE_MIMETYPES = frozenset({
+    'text/html', 'text/css', 'text/plain', 'text/javascript', 'application/javascript',
+    'application/json', 'application/manifest+json', 'image/svg+xml',
+})
+GZIP_MIN_SIZE = 500
+GZIP_MAX_STATIC_SIZE = 1024 * 1024
+
+def gzip_cache_validator(response):
+    """Return the value a cached gzip body must match, or None if the response isn't cacheable"""
+    # Static files are validated by their ETag, cached anonymous pages by the database signature
+    if request.endpoint == 'static':
+        return response.get_etag()[0]
+    return g.get('page_signature')
+
+@app.after_request
+def compress_response(response):
+    """Serve gzip-encoded text bodies when the client accepts them"""
+    # Admin pages carry CSRF tokens next to reflected input, so never compress them (BREACH)
+    if (response.status_code != 200 or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or 'Content-Encoding' in response.headers or 'gzip' not in request.accept_encodings
+            or session.get('admin_authenticated')):
+        return response
+
+    # Streamed bodies are only read into memory for small static files
+    if response.direct_passthrough and (request.endpoint != 'static'
+                                        or (response.content_length or 0) > GZIP_MAX_STATIC_SIZE):
+        return response
+
+    key = ('gzip', request.path)
+    validator = gzip_cache_validator(response)
+    with _data_cache_lock:
+        entry = _data_cache.get(key)
+    source = response.response
+    if validator is not None and entry is not None and entry[0] == validator:
+        body = entry[1]
+    else:
+        response.direct_passthrough = False
+        data = response.get_data()
+        if len(data) < GZIP_MIN_SIZE:
+            return response
+        body = gzip.compress(data, compresslevel=6)
+        if validator is not None:
+            with _data_cache_lock:
+                _data_cache[key] = (validator, body)
+
+    response.direct_passthrough = False
+    response.set_data(body)
+    if hasattr(source, 'close'):
+        source.close()
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
     return response
 
 # Validate CSRF token
 def validate_csrf_token():
     token = session.get('csrf_token')
     form_token = request.form.get('csrf_token') or request.headers.get('X-CSRF-Token')
-    return token and token == form_token
+    if not token or not form_token:
+        return False
+    return hmac.compare_digest(token.encode('utf-8'), form_token.encode('utf-8'))
 
 # Enhanced URL validation for SSRF protection
+def is_ip_literal(hostname):
+    """True if hostname is an IPv4 or IPv6 address rather than a name"""
+    # inet_pton is several times cheaper than a failed ipaddress.ip_address() parse
+    for family in (socket.AF_INET, socket.AF_INET6):
+        try:
+            socket.inet_pton(family, hostname)
+            return True
+        except OSError:
+            pass
+    return False
+
+@lru_cache(maxsize=1024)
+def resolve_hostname(hostname, ttl_bucket):
+    """Resolve hostname to all of its IPs; ttl_bucket expires entries every DNS_CACHE_TTL seconds"""
+    # AI_ADDRCONFIG skips AAAA queries on hosts without IPv6 (and A without IPv4)
+    addr_info = socket.getaddrinfo(hostname, None, socket.AF_UNSPEC, socket.SOCK_STREAM,
+                                   0, socket.AI_ADDRCONFIG)
+    # Same address can come back more than once; keep resolver order for pinning
+    return tuple(dict.fromkeys(info[4][0] for info in addr_info))
+
 def is_safe_url(url):
     """Validate URL to prevent SSRF attacks with comprehensive IPv4/IPv6 checking"""
+    is_safe, message, _ = check_url_safety(url)
+    return is_safe, message
+
+def check_url_safety(url):
+    """Like is_safe_url, but also return the validated IPs so callers can connect to them directly"""
     try:
-        parsed = urlparse(url)
+        # Callers that already split the URL pass the SplitResult to skip a re-parse
+        parsed = url if isinstance(url, SplitResult) else urlsplit(url)
 
         # Only allow HTTP and HTTPS schemes
         if parsed.scheme not in ['http', 'https']:
-            return False, 'Only HTTP and HTTPS schemes are allowed'
+            return False, 'Only HTTP and HTTPS schemes are allowed', []
 
         # Ensure hostname is present
         if not parsed.hostname:
-            return False, 'Invalid hostname'
+            return False, 'Invalid hostname', []
 
         hostname = parsed.hostname.lower()
 
         # Block IP literals in URLs (both IPv4 and IPv6)
-        try:
-            ip_literal = ipaddress.ip_address(hostname)
-            return False, 'IP literal addresses are not allowed'
-        except ValueError:
-            # Not an IP literal, continue with hostname validation
-            pass
+        if is_ip_literal(hostname):
+            return False, 'IP literal addresses are not allowed', []
 
         # Block localhost and other dangerous hostnames
-        dangerous_hostnames = [
-            'localhost', '127.0.0.1', '::1',
-            'metadata.google.internal',
-            '169.254.169.254',  # AWS/GCP metadata
-            '100.100.100.200',  # Alibaba metadata
-            '192.0.0.192',      # Oracle metadata
-        ]
-
-        if hostname in dangerous_hostnames:
-            return False, f'Hostname "{hostname}" is not allowed'
+        if hostname in BLOCKED_HOSTNAMES:
+            return False, f'Hostname "{hostname}" is not allowed', []
 
         # Resolve hostname to ALL IP addresses (both IPv4 and IPv6)
+        if dns_failures.get(hostname, 0) > time.monotonic():
+            return False, 'Could not resolve hostname', []
         try:
-            # Get all address info for both IPv4 and IPv6
-            addr_info = socket.getaddrinfo(hostname, None, socket.AF_UNSPEC, socket.SOCK_STREAM)
-            resolved_ips = [info[4][0] for info in addr_info]
+            # Get all address info for both IPv4 and IPv6 (cached briefly)
+            resolved_ips = list(resolve_hostname(hostname, int(time.time() // DNS_CACHE_TTL)))
 
             if not resolved_ips:
-                return False, 'Could not resolve hostname'
-        except (socket.gaierror, ValueError):
-            return False, 'Could not resolve hostname'
+                return False, 'Could not resolve hostname', []
+        except socket.gaierror:
+            if len(dns_failures) >= DNS_NEGATIVE_LIMIT:
+                dns_failures.clear()
+            dns_failures[hostname] = time.monotonic() + DNS_NEGATIVE_TTL
+            return False, 'Could not resolve hostname', []
+        except ValueError:
+            return False, 'Could not resolve hostname', []
 
         # Validate ALL resolved IP addresses
         for ip_str in resolved_ips:
@@ -936,64 +1252,95 @@ def is_safe_url(url):
 
                 # Block private IP ranges (both IPv4 and IPv6)
                 if ip_obj.is_private or ip_obj.is_loopback or ip_obj.is_link_local:
-                    return False, f'Private, loopback, and link-local IPs are not allowed (resolved: {ip_str})'
+                    return False, f'Private, loopback, and link-local IPs are not allowed (resolved: {ip_str})', []
 
                 # Block reserved IP ranges
                 if ip_obj.is_reserved or ip_obj.is_multicast:
-                    return False, f'Reserved and multicast IPs are not allowed (resolved: {ip_str})'
+                    return False, f'Reserved and multicast IPs are not allowed (resolved: {ip_str})', []
 
                 # Block cloud metadata endpoints and other dangerous IPs
-                dangerous_ips = [
-                    '169.254.169.254',  # AWS/GCP metadata
-                    '100.100.100.200',  # Alibaba metadata
-                    '192.0.0.192',      # Oracle metadata
-                    '::1',              # IPv6 localhost
-                    'fd00:ec2::254',    # AWS IPv6 metadata
-                ]
-
-                if str(ip_obj) in dangerous_ips:
-                    return False, f'Access to dangerous IP {ip_obj} is not allowed'
-
-                # Additional IPv6 checks
-                if ip_obj.version == 6:
-                    # Block unique local addresses (fc00::/7)
-                    if ipaddress.IPv6Address(ip_str) in ipaddress.IPv6Network('fc00::/7'):
-                        return False, f'IPv6 unique local addresses are not allowed (resolved: {ip_str})'
+                if str(ip_obj) in BLOCKED_IPS:
+                    return False, f'Access to dangerous IP {ip_obj} is not allowed', []
 
-                    # Block site-local addresses (fec0::/10) - deprecated but still blocked
-                    if ipaddress.IPv6Address(ip_str) in ipaddress.IPv6Network('fec0::/10'):
-                        return False, f'IPv6 site-local addresses are not allowed (resolved: {ip_str})'
+                # Additional IPv6 checks (unique local and site-local ranges)
+                if ip_obj.version == 6:
+                    for network, reason in BLOCKED_IPV6_NETWORKS:
+                        if ip_obj in network:
+                            return False, f'{reason} (resolved: {ip_str})', []
 
             except ValueError:
-                return False, f'Invalid IP address resolved: {ip_str}'
+                return False, f'Invalid IP address resolved: {ip_str}', []
 
         # Block common internal service ports
-        dangerous_ports = [22, 23, 25, 53, 135, 139, 445, 993, 995, 1433, 3306, 3389, 5432, 5984, 6379, 8080, 9200, 27017]
-        if parsed.port and parsed.port in dangerous_ports:
-            return False, f'Access to port {parsed.port} is not allowed'
+        if parsed.port and parsed.port in BLOCKED_PORTS:
+            return False, f'Access to port {parsed.port} is not allowed', []
 
-        return True, 'URL is safe'
+        return True, 'URL is safe', resolved_ips
 
     except Exception as e:
-        return False, f'URL validation error: {str(e)}'
+        return False, f'URL validation error: {str(e)}', []
+
+class PinnedHostAdapter(HTTPAdapter):
+    """HTTPS adapter for a URL rewritten to a validated IP: SNI and certificate checks still use the hostname"""
+
+    def __init__(self, hostname, **kwargs):
+        self.hostname = hostname
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['server_hostname'] = self.hostname
+        kwargs['assert_hostname'] = self.hostname
+        super().init_poolmanager(*args, **kwargs)
+
+@lru_cache(maxsize=64)
+def pinned_session(hostname):
+    """Shared keep-alive session for one scraped hostname"""
+    # Per-host session so repeat fetches and redirects reuse a warm TLS connection
+    http = requests.Session()
+    http.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    http.mount('https://', PinnedHostAdapter(hostname, pool_connections=4, pool_maxsize=8, max_retries=0))
+    http.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=0))
+    return http
+
+def pin_url_to_ip(parts, ip):
+    """Return the split URL with its host replaced by ip, plus the Host header to send"""
+    host_header = parts.hostname if parts.port is None else f'{parts.hostname}:{parts.port}'
+    netloc = f'[{ip}]' if ':' in ip else ip
+    if parts.port is not None:
+        netloc = f'{netloc}:{parts.port}'
+    return urlunsplit((parts.scheme, netloc, parts.path, parts.query, '')), host_header
+
+def secure_fetch_url(url, timeout=10, max_size=5*1024*1024, max_redirects=3, deadline=None):
+    """Securely fetch URL content (raw bytes) with manual redirect handling and comprehensive SSRF protection"""
+    # deadline is a time.monotonic() value bounding the whole fetch, redirects and body included
+    def remaining():
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise ValueError('Request timeout')
+        return left
 
-def secure_fetch_url(url, timeout=10, max_size=5*1024*1024, max_redirects=3):
-    """Securely fetch URL content with manual redirect handling and comprehensive SSRF protection"""
     try:
         visited_urls = set()
         redirect_count = 0
         current_url = url
 
         while redirect_count <= max_redirects:
-            # Check for redirect loops
-            if current_url in visited_urls:
+            # Split once per hop; the checks, pinning and session lookup below share it
+            parts = urlsplit(current_url)
+
+            # Check for redirect loops using canonical URLs
+            visit_key = normalize_scrape_url(parts)
+            if visit_key in visited_urls:
                 raise ValueError('Redirect loop detected')
-            visited_urls.add(current_url)
+            visited_urls.add(visit_key)
 
-            # Validate current URL
-            is_safe, message = is_safe_url(current_url)
+            # Validate the URL (including redirect targets) and keep the IPs it resolved to
+            is_safe, message, resolved_ips = check_url_safety(parts)
             if not is_safe:
+                if redirect_count:
+                    raise ValueError(f'Redirect to unsafe URL blocked: {message}')
                 raise ValueError(f'Unsafe URL: {message}')
+            pinned_url, host_header = pin_url_to_ip(parts, resolved_ips[0])
 
             # Make request with security headers and NO automatic redirects
             headers = {
@@ -1001,62 +1348,61 @@ def secure_fetch_url(url, timeout=10, max_size=5*1024*1024, max_redirects=3):
                 'Accept': 'text/html,application/xhtml+xml,text/plain',
                 'Accept-Language': 'en-US,en;q=0.9',
                 'DNT': '1',
-                'Connection': 'close'
+                'Host': host_header
             }
 
-            response = requests.get(
-                current_url,
+            response = pinned_session(parts.hostname).get(
+                pinned_url,
                 headers=headers,
-                timeout=timeout,
+                timeout=timeout if deadline is None else min(timeout, remaining()),
                 allow_redirects=False,  # CRITICAL: Disable automatic redirects
                 stream=True,
                 verify=True
             )
+            try:
+                # Handle redirects manually
+                if response.status_code in [301, 302, 303, 307, 308]:
+                    if redirect_count >= max_redirects:
+                        raise ValueError(f'Too many redirects (max: {max_redirects})')
 
-            # Handle redirects manually
-            if response.status_code in [301, 302, 303, 307, 308]:
-                if redirect_count >= max_redirects:
-                    raise ValueError(f'Too many redirects (max: {max_redirects})')
-
-                location = response.headers.get('Location')
-                if not location:
-                    raise ValueError('Redirect response missing Location header')
+                    location = response.headers.get('Location')
+                    if not location:
+                        raise ValueError('Redirect response missing Location header')
 
-                # Resolve relative URLs
-                if location.startswith('/'):
-                    from urllib.parse import urljoin
-                    current_url = urljoin(current_url, location)
-                elif not location.startswith(('http://', 'https://')):
-                    from urllib.parse import urljoin
+                    # urljoin resolves relative locations and passes absolute ones through
                     current_url = urljoin(current_url, location)
-                else:
-                    current_url = location
-
-                # CRITICAL: Re-validate redirect target for SSRF protection
-                is_safe, safety_message = is_safe_url(current_url)
-                if not is_safe:
-                    raise ValueError(f'Redirect to unsafe URL blocked: {safety_message}')
-
-                redirect_count += 1
-                continue
 
-            # Not a redirect, process the response
-            response.raise_for_status()
-
-            # Check response size before reading content
-            content_length = response.headers.get('content-length')
-            if content_length and int(content_length) > max_size:
-                raise ValueError(f'Content too large: {content_length} bytes (max: {max_size})')
-
-            # Read content with size limit
-            content = b''
-            for chunk in response.iter_content(chunk_size=8192):
-                content += chunk
-                if len(content) > max_size:
-                    raise ValueError(f'Content too large (max: {max_size} bytes)')
-
-            # Return the final content
-            return content.decode('utf-8', errors='replace')
+                    # CRITICAL: the redirect target is re-validated at the top of the loop
+                    redirect_count += 1
+                    continue
+
+                # Not a redirect, process the response
+                response.raise_for_status()
+
+                # Check response size before reading content
+                content_length = response.headers.get('content-length')
+                if content_length and int(content_length) > max_size:
+                    raise ValueError(f'Content too large: {content_length} bytes (max: {max_size})')
+
+                # A declared length bounds the read only for plain, unchunked bodies; a deadline needs the loop
+                if (deadline is None and content_length and 'transfer-encoding' not in response.headers
+                        and response.headers.get('content-encoding', 'identity') == 'identity'):
+                    return response.content
+
+                # Read with a size limit; read1 returns what has arrived, so the deadline check stays live
+                content = bytearray()
+                while chunk := response.raw.read1(65536, decode_content=True):
+                    content.extend(chunk)
+                    if len(content) > max_size:
+                        raise ValueError(f'Content too large (max: {max_size} bytes)')
+                    if deadline is not None:
+                        remaining()
+
+                # Return the final content
+                return bytes(content)
+            finally:
+                # Hands a fully read connection back to the pool (or drops a partial one)
+                response.close()
 
         raise ValueError(f'Too many redirects (max: {max_redirects})')
 
@@ -1077,68 +1423,67 @@ def secure_fetch_url(url, timeout=10, max_size=5*1024*1024, max_redirects=3):
 
 # Routes
 @app.route('/')
+@cache_anonymous_page
 def index():
     courses_data = load_courses()
-    config = load_config()
-    response = make_response(render_template('index.html',
-                                           courses=courses_data,
-                                           config=config))
-    # Add no-cache headers to ensure fresh content loading
-    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
-    return response
+    config = get_config()
+    return render_template('index.html',
+                         courses=courses_data,
+                         config=config)
 
 @app.route('/module/<module_id>')
+@cache_anonymous_page
 def module_detail(module_id):
-    courses_data = load_courses()
-    module = None
-
-    for m in courses_data.get('modules', []):
-        if m['id'] == module_id:
-            module = m
-            break
+    module = get_module(module_id)
 
     if not module:
         flash('Module not found', 'error')
         return redirect(url_for('index'))
 
-    # Load module content from database and sanitize it
-    raw_content = load_module_content(module_id)
-    if raw_content:
-        module['content'] = Markup(sanitize_html(raw_content))
-    else:
-        module['content'] = Markup("<p>No content available for this module.</p>")
+    # Sanitized content is cached, so hot modules skip the query and bleach pass
+    module['content'] = render_module_content(module_id)
 
-    config = load_config()
-    response = make_response(render_template('module.html',
-                                           module=module,
-                                           config=config))
-    # Add no-cache headers to ensure fresh content loading
-    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
-    return response
+    config = get_config()
+    return render_template('module.html',
+                         module=module,
+                         config=config)
 
 @app.route('/quiz/<module_id>')
+@cache_anonymous_page
 def quiz(module_id):
-    courses_data = load_courses()
-    module = None
-
-    for m in courses_data.get('modules', []):
-        if m['id'] == module_id:
-            module = m
-            break
+    module = get_module(module_id)
 
     if not module or not module.get('quiz'):
         flash('Quiz not found', 'error')
         return redirect(url_for('index'))
 
-    config = load_config()
+    config = get_config()
     return render_template('quiz.html',
                          module=module,
                          config=config)
 
+def answer_token(value):
+    """Normalize a quiz answer so form strings, JSON numbers and booleans compare equal"""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return None if value is None else str(value)
+
+def score_quiz(correct, answers):
+    """Count correct answers; answers is a list by question index, or a {"index": option} dict from older clients"""
+    # Answer keys are normalized when cached; only convert the submitted side
+    if isinstance(answers, list):
+        given = [answer_token(answer) for answer in answers[:len(correct)]]
+    elif isinstance(answers, dict):
+        given = [answer_token(answers.get(str(i))) for i in range(len(correct))]
+    else:
+        return 0
+    # Compare element-wise in C rather than branching per question in Python
+    return sum(map(operator.eq, given, correct))
+
+@app.route('/api/csrf-token')
+def csrf_token_api():
+    return jsonify({'csrf_token': generate_csrf_token()})
+
 @app.route('/api/quiz-submit', methods=['POST'])
 def quiz_submit():
     # CSRF protection for quiz submissions
@@ -1152,27 +1497,15 @@ def quiz_submit():
     module_id = data.get('module_id')
     answers = data.get('answers', {})
 
-    courses_data = load_courses()
-    module = None
-
-    for m in courses_data.get('modules', []):
-        if m['id'] == module_id:
-            module = m
-            break
+    module = get_module(module_id)
+    answer_key = get_answer_key(module_id)
 
-    if not module or not module.get('quiz'):
+    if not module or answer_key is None:
         return jsonify({'error': 'Quiz not found'}), 404
 
     # Calculate score
-    total_questions = len(module['quiz'].get('questions', []))
-    correct_answers = 0
-
-    for i, question in enumerate(module['quiz'].get('questions', [])):
-        user_answer = answers.get(str(i))
-        correct_answer = question.get('correct_answer')
-
-        if user_answer == correct_answer:
-            correct_answers += 1
+    total_questions = len(answer_key)
+    correct_answers = score_quiz(answer_key, answers)
 
     score = (correct_answers / total_questions) * 100 if total_questions > 0 else 0
     passed = score >= module['quiz'].get('passing_score', 70)
@@ -1187,16 +1520,13 @@ def quiz_submit():
 @app.route('/sw.js')
 def service_worker():
     """Serve the service worker from root scope for PWA installability"""
-    response = app.send_static_file('sw.js')
-    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
-    return response
+    return app.send_static_file('sw.js')
 
 @app.route('/clear-cache')
 def clear_cache():
     """Manual cache clearing endpoint"""
-    response = make_response('''
+    # Never cached: add_no_cache_headers applies to this response like any other
+    return '''
     <!DOCTYPE html>
     <html>
     <head>
@@ -1231,25 +1561,74 @@ def clear_cache():
         </script>
     </body>
     </html>
-    ''')
-    
-    # Ensure this response is never cached
-    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
-    response.headers['Last-Modified'] = '0'
-    response.headers['ETag'] = ''
-    
-    return response
+    '''
+
+def hex_to_rgb(hex_color):
+    """Convert a '#rrggbb' color to a ReportLab RGB tuple (black if malformed)"""
+    hex_color = hex_color.lstrip('#')
+    if len(hex_color) == 6:
+        red, green, blue = bytes.fromhex(hex_color)
+        return (red / 255.0, green / 255.0, blue / 255.0)
+    return (0, 0, 0)
+
+@lru_cache(maxsize=4)
+def certificate_timestamps(second):
+    """Return (date stamp, file stamp, display date) for an epoch second"""
+    # Bursts of certificates within the same second share one set of strftime calls
+    now = datetime.fromtimestamp(second)
+    return now.strftime('%Y%m%d'), now.strftime('%Y%m%d_%H%M%S'), now.strftime('%B %d, %Y')
+
+@lru_cache(maxsize=1024)
+def text_width(text, font_name, font_size):
+    """Memoized ReportLab string width; certificate headings repeat on every PDF"""
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    return stringWidth(text, font_name, font_size)
+
+def draw_centred(c, x, y, text, font_name, font_size):
+    """Equivalent of canvas.drawCentredString using the cached width of the font the caller set"""
+    c.drawString(x - text_width(text, font_name, font_size) / 2.0, y, text)
+
+@lru_cache(maxsize=16)
+def _certificate_image_reader(path, mtime_ns):
+    """Decoded logo/signature image, reused until the file changes"""
+    from reportlab.lib.utils import ImageReader
+    return ImageReader(path)
+
+def certificate_image(path):
+    """Return a drawImage source for a certificate logo or signature file"""
+    if path.lower().endswith(('.jpg', '.jpeg')):
+        return path  # ReportLab embeds JPEG files without decoding them
+    return _certificate_image_reader(path, os.stat(path).st_mtime_ns)
+
+def get_certificate_layout(template):
+    """Return the request-independent parts of a certificate for this template"""
+    return _certificate_layout(tuple(sorted(template.items())))
+
+@lru_cache(maxsize=32)
+def _certificate_layout(template_items):
+    template = dict(template_items)
+    title_text = template['title'].upper()
 
-# Add cache control for static files in development
-@app.after_request
-def after_request(response):
-    if app.debug:  # Only in debug mode
-        response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-        response.headers['Pragma'] = 'no-cache'
-        response.headers['Expires'] = '0'
-    return response
+    # A subtitle with a single {FULL NAME} placeholder is split over two lines
+    subtitle = template['subtitle']
+    parts = subtitle.split('{FULL NAME}')
+    if len(parts) == 2:
+        subtitle_lines = (parts[0].strip(), parts[1].strip())
+        module_offset = 80
+    else:
+        subtitle_lines = (subtitle.replace('{FULL NAME}', ''),)
+        module_offset = 50
+
+    company_name = template.get('company_name') or ''
+    return {
+        'bg_color': hex_to_rgb(template['background_color']),
+        'text_color': hex_to_rgb(template['text_color']),
+        'company_name': company_name.upper() if company_name.strip() else '',
+        'title_text': title_text,
+        'title_width': text_width(title_text, "Times-Bold", template['font_size_title'] + 8),
+        'subtitle_lines': subtitle_lines,
+        'module_offset': module_offset,
+    }
 
 @app.route('/certificate/<module_id>')
 def generate_certificate(module_id):
@@ -1261,17 +1640,11 @@ def generate_certificate(module_id):
         return redirect(url_for('module_detail', module_id=module_id))
 
     # Validate full name (basic security check)
-    if len(full_name) > 100 or any(char in full_name for char in ['<', '>', '"', "'", '&']):
+    if len(full_name) > 100 or UNSAFE_TEXT_PATTERN.search(full_name):
         flash('Invalid name provided', 'error')
         return redirect(url_for('module_detail', module_id=module_id))
 
-    courses_data = load_courses()
-    module = None
-
-    for m in courses_data.get('modules', []):
-        if m['id'] == module_id:
-            module = m
-            break
+    module = get_module(module_id)
 
     if not module:
         flash('Module not found', 'error')
@@ -1319,29 +1692,29 @@ def generate_certificate(module_id):
         save_certificate_template(default_template_data)
         template = default_template_data
 
+    # One clock read for the number, filename and printed date
+    date_stamp, file_stamp, display_date = certificate_timestamps(int(time.time()))
+
     # Generate unique certificate number
-    cert_number = f"CERT-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
+    cert_number = f"CERT-{date_stamp}-{secrets.token_hex(4).upper()}"
 
     # Generate PDF certificate using template
-    filename = f"certificate_{full_name.replace(' ', '_')}_{module_id[:8]}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    filepath = os.path.join("static", "resources", filename)
+    filename = f"certificate_{full_name.replace(' ', '_')}_{module_id[:8]}_{file_stamp}.pdf"
 
-    # Ensure resources directory exists
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    # Render into memory; the PDF never touches the filesystem
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import letter
 
-    c = canvas.Canvas(filepath, pagesize=letter)
+    pdf_buffer = io.BytesIO()
+    c = canvas.Canvas(pdf_buffer, pagesize=letter)
     width, height = letter
 
-    # Parse colors (hex to RGB)
-    def hex_to_rgb(hex_color):
-        hex_color = hex_color.lstrip('#')
-        if len(hex_color) == 6:
-            return tuple(int(hex_color[i:i+2], 16) / 255.0 for i in (0, 2, 4))
-        return (0, 0, 0)
+    # Colors and static text are precomputed once per template
+    layout = get_certificate_layout(template)
 
     # Professional color scheme
-    bg_color = hex_to_rgb(template['background_color'])
-    text_color = hex_to_rgb(template['text_color'])
+    bg_color = layout['bg_color']
+    text_color = layout['text_color']
     accent_color = (0.2, 0.4, 0.8)  # Professional blue
     gold_color = (0.8, 0.6, 0.2)    # Gold accent
 
@@ -1402,26 +1775,28 @@ def generate_certificate(module_id):
                 if os.path.exists(logo_path):
                     logo_x = (width - template['logo_width']) / 2
                     logo_y = header_y_start
-                    c.drawInlineImage(logo_path, logo_x, logo_y,
-                                      width=template['logo_width'],
-                                      height=template['logo_height'])
+                    c.drawImage(certificate_image(logo_path), logo_x, logo_y,
+                                width=template['logo_width'],
+                                height=template['logo_height'], mask='auto')
                     logo_drawn = True
                     header_y_start -= template['logo_height'] + 20
         except Exception as e:
             print(f"Error drawing logo: {e}")
 
     # Company name with professional styling
-    if template.get('company_name') and template['company_name'].strip():
-        c.setFont("Helvetica-Bold", template['font_size_header'] + 2)
+    if layout['company_name']:
+        font = ("Helvetica-Bold", template['font_size_header'] + 2)
+        c.setFont(*font)
         c.setFillColorRGB(*accent_color)
-        c.drawCentredString(width / 2, header_y_start, template['company_name'].upper())
+        draw_centred(c, width / 2, header_y_start, layout['company_name'], *font)
         c.setFillColorRGB(*text_color)
         header_y_start -= 35
 
     # Header text
     if template.get('header_text') and template['header_text'].strip():
-        c.setFont("Helvetica", template['font_size_header'])
-        c.drawCentredString(width / 2, header_y_start, template['header_text'])
+        font = ("Helvetica", template['font_size_header'])
+        c.setFont(*font)
+        draw_centred(c, width / 2, header_y_start, template['header_text'], *font)
         header_y_start -= 30
 
     # Decorative line under header
@@ -1433,71 +1808,61 @@ def generate_certificate(module_id):
 
     # Certificate title with enhanced typography
     title_y = line_y - 60
-    c.setFont("Times-Bold", template['font_size_title'] + 8)
+    font = ("Times-Bold", template['font_size_title'] + 8)
+    c.setFont(*font)
     c.setFillColorRGB(*accent_color)
-    title_text = template['title'].upper()
-    c.drawCentredString(width / 2, title_y, title_text)
+    draw_centred(c, width / 2, title_y, layout['title_text'], *font)
 
     # Add decorative underline for title
     c.setStrokeColorRGB(*gold_color)
     c.setLineWidth(1)
-    title_width = c.stringWidth(title_text, "Times-Bold", template['font_size_title'] + 8)
+    title_width = layout['title_width']
     underline_y = title_y - 8
     c.line((width - title_width) / 2, underline_y, (width + title_width) / 2, underline_y)
 
     # User's full name in requested format (prominent display above subtitle)
     name_y = title_y - 80
-    c.setFont("Times-Bold", template['font_size_completion'])
+    font = ("Times-Bold", template['font_size_completion'])
+    c.setFont(*font)
     c.setFillColorRGB(*accent_color)
 
     # Format: "Module Completed by {FULL NAME}" - positioned ABOVE subtitle
     completion_text = f"Module Completed by {full_name}"
-    c.drawCentredString(width / 2, name_y, completion_text)
+    draw_centred(c, width / 2, name_y, completion_text, *font)
 
     # Certificate subtitle positioned BELOW the completion text
     subtitle_y = name_y - 80
-    c.setFont("Times-Roman", template['font_size_subtitle'] + 2)
+    font = ("Times-Roman", template['font_size_subtitle'] + 2)
+    c.setFont(*font)
     c.setFillColorRGB(*text_color)
-    subtitle_text = template['subtitle'].replace('{FULL NAME}', '')
-    
-    if '{FULL NAME}' in template['subtitle']:
-        # Split subtitle to handle the full text properly
-        parts = template['subtitle'].split('{FULL NAME}')
-        if len(parts) == 2:
-            # Draw first part
-            c.drawCentredString(width / 2, subtitle_y, parts[0].strip())
-
-            # Draw second part below first part
-            c.drawCentredString(width / 2, subtitle_y - 30, parts[1].strip())
-            module_y = subtitle_y - 80
-        else:
-            c.drawCentredString(width / 2, subtitle_y, subtitle_text)
-            module_y = subtitle_y - 50
-    else:
-        c.drawCentredString(width / 2, subtitle_y, subtitle_text)
-        module_y = subtitle_y - 50
+    for i, line in enumerate(layout['subtitle_lines']):
+        draw_centred(c, width / 2, subtitle_y - 30 * i, line, *font)
+    module_y = subtitle_y - layout['module_offset']
 
     # Module name with elegant presentation
-    c.setFont("Times-Bold", template['font_size_module'] + 2)
+    font = ("Times-Bold", template['font_size_module'] + 2)
+    c.setFont(*font)
     c.setFillColorRGB(*accent_color)
     module_text = f'"{module["title"]}"'
-    c.drawCentredString(width / 2, module_y, module_text)
+    draw_centred(c, width / 2, module_y, module_text, *font)
 
     # Date with professional formatting
     date_y = module_y - 60
-    c.setFont("Times-Roman", template['font_size_date'] + 2)
+    font = ("Times-Roman", template['font_size_date'] + 2)
+    c.setFont(*font)
     c.setFillColorRGB(*text_color)
-    date_text = f"Completed on {datetime.now().strftime('%B %d, %Y')}"
-    c.drawCentredString(width / 2, date_y, date_text)
+    date_text = f"Completed on {display_date}"
+    draw_centred(c, width / 2, date_y, date_text, *font)
 
     # Footer section
     footer_y = date_y - 80
 
     # Footer text with professional styling
     if template.get('footer_text') and template['footer_text'].strip():
-        c.setFont("Times-Italic", template['font_size_footer'] + 1)
+        font = ("Times-Italic", template['font_size_footer'] + 1)
+        c.setFont(*font)
         c.setFillColorRGB(0.4, 0.4, 0.4)  # Lighter gray for footer
-        c.drawCentredString(width / 2, footer_y, template['footer_text'])
+        draw_centred(c, width / 2, footer_y, template['footer_text'], *font)
         footer_y -= 30
 
     # Professional signature section
@@ -1511,9 +1876,10 @@ def generate_certificate(module_id):
         c.rect(signature_x - 20, signature_area_y - 10, 180, 80, fill=False, stroke=True)
 
         # "Authorized Signature" label
-        c.setFont("Helvetica", 8)
+        font = ("Helvetica", 8)
+        c.setFont(*font)
         c.setFillColorRGB(0.5, 0.5, 0.5)
-        c.drawCentredString(signature_x + 70, signature_area_y + 55, "AUTHORIZED SIGNATURE")
+        draw_centred(c, signature_x + 70, signature_area_y + 55, "AUTHORIZED SIGNATURE", *font)
 
         # Signature image or line
         signature_image_drawn = False
@@ -1529,9 +1895,9 @@ def generate_certificate(module_id):
                         sig_path = f'static/{sig_url}'
 
                     if os.path.exists(sig_path):
-                        c.drawInlineImage(sig_path, signature_x, signature_area_y + 15,
-                                          width=template['signature_width'],
-                                          height=template['signature_height'])
+                        c.drawImage(certificate_image(sig_path), signature_x, signature_area_y + 15,
+                                    width=template['signature_width'],
+                                    height=template['signature_height'], mask='auto')
                         signature_image_drawn = True
             except Exception as e:
                 print(f"Error drawing signature: {e}")
@@ -1543,14 +1909,16 @@ def generate_certificate(module_id):
             c.line(signature_x, signature_area_y + 25, signature_x + 140, signature_area_y + 25)
 
         # Signature name and title
-        c.setFont("Times-Bold", template['font_size_signature'] + 2)
+        font = ("Times-Bold", template['font_size_signature'] + 2)
+        c.setFont(*font)
         c.setFillColorRGB(*text_color)
-        c.drawCentredString(signature_x + 70, signature_area_y + 10, template['signature_name'])
+        draw_centred(c, signature_x + 70, signature_area_y + 10, template['signature_name'], *font)
 
         if template.get('signature_title') and template['signature_title'].strip():
-            c.setFont("Times-Roman", template['font_size_signature'])
+            font = ("Times-Roman", template['font_size_signature'])
+            c.setFont(*font)
             c.setFillColorRGB(0.4, 0.4, 0.4)
-            c.drawCentredString(signature_x + 70, signature_area_y - 5, template['signature_title'])
+            draw_centred(c, signature_x + 70, signature_area_y - 5, template['signature_title'], *font)
 
     # Add final decorative elements
     # Bottom decorative border
@@ -1566,22 +1934,129 @@ def generate_certificate(module_id):
         c.circle(x_pos, deco_y, 3, fill=True)
 
     c.save()
-
-    @after_this_request
-    def remove_file(response):
-        try:
-            os.remove(filepath)
-        except OSError:
-            pass
-        return response
+    pdf_buffer.seek(0)
 
     return send_file(
-        filepath,
+        pdf_buffer,
         as_attachment=True,
         download_name=filename,
         mimetype='application/pdf'
     )
 
+def normalize_scrape_url(url):
+    """Canonicalize a URL (case, query order, fragment) for use as a scrape cache key"""
+    parts = url if isinstance(url, SplitResult) else urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', query, ''))
+
+def fetch_url_text(url):
+    """Fetch a URL and extract its main text"""
+    # Securely fetch URL content on the shared pool, bounded by an overall deadline
+    # The deadline is also checked inside the fetch, so a slow-drip body stops the worker thread too
+    deadline = time.monotonic() + SCRAPE_FETCH_DEADLINE
+    fetch_future = background_executor.submit(secure_fetch_url, url, timeout=10, max_size=5*1024*1024,
+                                              deadline=deadline)
+    try:
+        html_content = fetch_future.result(timeout=SCRAPE_FETCH_DEADLINE)
+    except FutureTimeoutError:
+        fetch_future.cancel()  # Only drops a fetch still queued behind a busy pool
+        raise ValueError('Request timeout')
+
+    # Extract text from the first SCRAPE_EXTRACT_LIMIT bytes with trafilatura's fast mode
+    import trafilatura
+    text = trafilatura.extract(html_content[:SCRAPE_EXTRACT_LIMIT], include_comments=False, fast=True)
+
+    if not text:
+        raise ValueError('Could not extract content from URL')
+
+    # Limit extracted text size
+    if len(text) > 50000:  # 50KB text limit
+        text = text[:50000] + '... [truncated]'
+
+    return text
+
+def scrape_url_text(url, cache_period):
+    """Fetch a URL's main text, reusing it per normalized URL and period"""
+    # Only the cache key is normalized; the URL as given is what gets fetched
+    key = (normalize_scrape_url(url), cache_period)
+    text = scraped_texts.get(key)
+    if text is None:
+        text = fetch_url_text(url)
+        if len(scraped_texts) >= SCRAPE_CACHE_LIMIT:
+            scraped_texts.clear()
+        scraped_texts[key] = text
+    return text
+
+def generate_quiz_questions(text):
+    """Generate quiz questions for scraped text with OpenAI; empty when unavailable or on error"""
+    openai_client = get_openai_client()
+    if not openai_client:
+        return []
+
+    try:
+        # Limit content sent to OpenAI
+        content_for_ai = text[:2000]
+
+        response = openai_client.chat.completions.create(
+            model="gpt-4o",
+            messages=[
+                {
+                    "role": "system",
+                    "content": "Generate 3-5 multiple choice quiz questions based on the provided text content. Respond with JSON in this format: {'questions': [{'question': 'Question text', 'options': ['A', 'B', 'C', 'D'], 'correct_answer': 0, 'type': 'multiple_choice'}]}"
+                },
+                {"role": "user", "content": f"Generate quiz questions for this content:\n\n{content_for_ai}"}
+            ],
+            response_format={"type": "json_object"},
+            max_tokens=800  # 3-5 questions fit comfortably; caps generation latency
+        )
+
+        ai_content = response.choices[0].message.content
+        if ai_content:
+            quiz_data = json_loads(ai_content)
+        else:
+            quiz_data = {}
+        return quiz_data.get('questions', [])
+    except Exception as e:
+        print(f"Error generating quiz questions: {e}")
+        # Don't fail the import if AI generation fails
+        return []
+
+def quiz_job_id(url, cache_period):
+    """Deterministic job id for a URL and cache period, shared by every worker"""
+    return hashlib.blake2b(repr((normalize_scrape_url(url), cache_period)).encode('utf-8'), digest_size=16).hexdigest()
+
+def run_quiz_job(job_id, text):
+    """Generate quiz questions and record them on the job row"""
+    try:
+        questions = generate_quiz_questions(text)
+    except Exception as e:
+        print(f"Quiz job error: {e}")
+        questions = []
+    conn = connect_db()
+    try:
+        with conn:
+            conn.execute("UPDATE quiz_jobs SET status = 'done', result = ? WHERE id = ?",
+                         (json_dumps(questions), job_id))
+    finally:
+        conn.close()
+
+def start_quiz_job(url, cache_period, text):
+    """Start quiz generation unless a worker already has, and return a pollable job id"""
+    job_id = quiz_job_id(url, cache_period)
+    now = time.time()
+    conn = connect_db()
+    try:
+        with conn:
+            conn.execute('DELETE FROM quiz_jobs WHERE created_at < ?', (now - SCRAPE_CACHE_TTL,))
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO quiz_jobs (id, status, created_at) VALUES (?, 'pending', ?)",
+                (job_id, now)).rowcount
+    finally:
+        conn.close()
+    if inserted:
+        ai_executor.submit(run_quiz_job, job_id, text)
+    return job_id
+
 @app.route('/api/scrape-url', methods=['POST'])
 @require_admin
 def scrape_url():
@@ -1603,52 +2078,18 @@ def scrape_url():
         return jsonify({'error': 'URL too long'}), 400
 
     try:
-        # Securely fetch URL content
-        html_content = secure_fetch_url(url, timeout=10, max_size=5*1024*1024)
-
-        # Extract text content using trafilatura
-        text = trafilatura.extract(html_content)
+        # The period number only takes part in the cache key, so entries expire every SCRAPE_CACHE_TTL
+        cache_period = int(time.time() // SCRAPE_CACHE_TTL)
+        result = {
+            'content': scrape_url_text(url, cache_period),
+            'quiz_questions': []
+        }
 
-        if not text:
-            return jsonify({'error': 'Could not extract content from URL'}), 400
+        # Quiz generation takes seconds; hand back a job to poll instead of holding the request
+        if get_openai_client():
+            result['quiz_job'] = start_quiz_job(url, cache_period, result['content'])
 
-        # Limit extracted text size
-        if len(text) > 50000:  # 50KB text limit
-            text = text[:50000] + '... [truncated]'
-
-        # Generate quiz questions using OpenAI if available
-        quiz_questions = []
-        if openai_client:
-            try:
-                # Limit content sent to OpenAI
-                content_for_ai = text[:2000] if len(text) > 2000 else text
-
-                response = openai_client.chat.completions.create(
-                    model="gpt-4o",
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "Generate 3-5 multiple choice quiz questions based on the provided text content. Respond with JSON in this format: {'questions': [{'question': 'Question text', 'options': ['A', 'B', 'C', 'D'], 'correct_answer': 0, 'type': 'multiple_choice'}]}"
-                        },
-                        {"role": "user", "content": f"Generate quiz questions for this content:\n\n{content_for_ai}"}
-                    ],
-                    response_format={"type": "json_object"}
-                )
-
-                ai_content = response.choices[0].message.content
-                if ai_content:
-                    quiz_data = json.loads(ai_content)
-                else:
-                    quiz_data = {}
-                quiz_questions = quiz_data.get('questions', [])
-            except Exception as e:
-                print(f"Error generating quiz questions: {e}")
-                # Don't fail the entire request if AI generation fails
-
-        return jsonify({
-            'content': text,
-            'quiz_questions': quiz_questions
-        })
+        return jsonify(result)
 
     except ValueError as e:
         # These are our custom validation errors
@@ -1658,6 +2099,27 @@ def scrape_url():
         print(f"Scraping error: {e}")
         return jsonify({'error': 'Failed to process URL'}), 500
 
+@app.route('/api/quiz-job/<job_id>')
+@require_admin
+def quiz_job_status(job_id):
+    # Only reads the job row; the worker running the job is the one that writes it
+    conn = connect_db()
+    try:
+        row = conn.execute('SELECT status, result, created_at FROM quiz_jobs WHERE id = ?',
+                           (job_id,)).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    status, job_result, created_at = row
+    if status == 'done':
+        return jsonify({'done': True, 'quiz_questions': json_loads(job_result)})
+    # A job whose worker died never finishes; give up on it rather than poll forever
+    if time.time() - created_at > QUIZ_JOB_TIMEOUT:
+        return jsonify({'done': True, 'quiz_questions': []})
+    return jsonify({'done': False})
+
 # Admin routes
 @app.route('/admin/login', methods=['GET', 'POST'])
 def admin_login():
@@ -1667,17 +2129,19 @@ def admin_login():
             return redirect(url_for('admin_login'))
 
         passcode = request.form.get('passcode')
-        config = load_config()
+        config = get_config()
 
-        if passcode == config.get('admin_passcode', 'admin123'):
+        stored = str(config.get('admin_passcode', 'admin123'))
+        if passcode and hmac.compare_digest(passcode.encode('utf-8'), stored.encode('utf-8')):
             session['admin_authenticated'] = True
             session.permanent = True
-            session['csrf_token'] = str(uuid.uuid4())  # Regenerate token
+            session['csrf_token'] = secrets.token_urlsafe(24)  # Regenerate token
             return redirect(url_for('admin_dashboard'))
         else:
             flash('Invalid passcode', 'error')
 
-    config = load_config()
+    generate_csrf_token()  # The login form posts, so it needs a token up front
+    config = get_config()
     return render_template('admin/login.html', config=config)
 
 @app.route('/admin/logout', methods=['POST'])
@@ -1694,7 +2158,7 @@ def admin_logout():
 @require_admin
 def admin_dashboard():
     courses_data = load_courses()
-    config = load_config()
+    config = get_config()
     
     # Debug: Print module count to console
     module_count = len(courses_data.get('modules', []))
@@ -1724,7 +2188,7 @@ def admin_new_module():
             return redirect(url_for('admin_new_module'))
 
         # Generate unique module ID
-        module_id = str(uuid.uuid4())
+        module_id = secrets.token_hex(16)
 
         # Create module data
         module_data = {
@@ -1736,10 +2200,8 @@ def admin_new_module():
             'order': 0
         }
 
-        # Add module to courses data first (this creates the module in database)
-        courses_data = load_courses()
-        courses_data['modules'].append(module_data)
-        save_courses(courses_data)
+        # Insert just this module (this creates the module in database)
+        update_module_in_db(module_data)
 
         # Save module content to database (after module exists)
         if content:
@@ -1748,7 +2210,7 @@ def admin_new_module():
         flash('Module created successfully', 'success')
         return redirect(url_for('admin_dashboard'))
 
-    config = load_config()
+    config = get_config()
     return render_template('admin/module_form.html',
                          config=config,
                          module=None,
@@ -1757,13 +2219,7 @@ def admin_new_module():
 @app.route('/admin/module/<module_id>/edit', methods=['GET', 'POST'])
 @require_admin
 def admin_edit_module(module_id):
-    courses_data = load_courses()
-    module = None
-
-    for m in courses_data.get('modules', []):
-        if m['id'] == module_id:
-            module = m
-            break
+    module = get_module(module_id)
 
     if not module:
         flash('Module not found', 'error')
@@ -1782,14 +2238,14 @@ def admin_edit_module(module_id):
         if 'content' in request.form:
             save_module_content(module_id, request.form.get('content', ''))
 
-        save_courses(courses_data)
+        update_module_in_db(module)
         flash('Module updated successfully', 'success')
         return redirect(url_for('admin_dashboard'))
 
     # Load module content from database
     module['content'] = load_module_content(module_id) or ''
 
-    config = load_config()
+    config = get_config()
     return render_template('admin/module_form.html',
                          config=config,
                          module=module,
@@ -1801,11 +2257,8 @@ def admin_delete_module(module_id):
     if not validate_csrf_token():
         return jsonify({'error': 'Invalid CSRF token'}), 403
 
-    courses_data = load_courses()
-    courses_data['modules'] = [m for m in courses_data['modules'] if m['id'] != module_id]
-    save_courses(courses_data)
-
     # Content is automatically deleted by the database foreign key constraint
+    delete_module_from_db(module_id)
 
     return jsonify({'success': True})
 
@@ -1834,20 +2287,19 @@ def admin_update_config():
         validated_header = {}
 
         # Color validation (hex colors only)
-        import re
-        hex_color_pattern = r'^#[0-9A-Fa-f]{6}$'
-        for color_key in ['title_color', 'nav_text_color', 'background_gradient_start', 'background_gradient_middle', 'background_gradient_end']:
-            if color_key in header_data:
-                color_value = str(header_data[color_key])
-                if re.match(hex_color_pattern, color_value):
+        for color_key in HEADER_COLOR_KEYS:
+            color_value = header_data.get(color_key)
+            if color_value is not None:
+                color_value = str(color_value)
+                if HEX_COLOR_PATTERN.fullmatch(color_value):
                     validated_header[color_key] = color_value
 
         # Size validation (rem units only)
-        size_pattern = r'^\d+(\.\d+)?rem$'
-        for size_key in ['title_size', 'nav_text_size']:
-            if size_key in header_data:
-                size_value = str(header_data[size_key])
-                if re.match(size_pattern, size_value):
+        for size_key in HEADER_SIZE_KEYS:
+            size_value = header_data.get(size_key)
+            if size_value is not None:
+                size_value = str(size_value)
+                if REM_SIZE_PATTERN.fullmatch(size_value):
                     validated_header[size_key] = size_value
 
         # Boolean validation
@@ -1858,7 +2310,7 @@ def admin_update_config():
         if 'custom_emoji' in header_data:
             emoji_value = str(header_data['custom_emoji'])
             # Limit to 4 characters and strip any HTML/script-like content
-            if len(emoji_value) <= 4 and not any(char in emoji_value for char in ['<', '>', '"', "'", '&']):
+            if len(emoji_value) <= 4 and not UNSAFE_TEXT_PATTERN.search(emoji_value):
                 validated_header['custom_emoji'] = emoji_value
 
         # Update config with validated values only
@@ -1879,20 +2331,113 @@ def admin_reorder_modules():
     courses_data = load_courses()
     modules = courses_data.get('modules', [])
 
-    # Reorder modules based on provided order
+    # Reorder modules based on provided order via an id index
+    modules_by_id = {module['id']: module for module in modules}
     reordered_modules = []
     for module_id in module_order:
-        for module in modules:
-            if module['id'] == module_id:
-                module['order'] = len(reordered_modules)
-                reordered_modules.append(module)
-                break
+        module = modules_by_id.get(module_id)
+        if module is not None:
+            module['order'] = len(reordered_modules)
+            reordered_modules.append(module)
 
     courses_data['modules'] = reordered_modules
     save_courses(courses_data)
 
     return jsonify({'success': True})
 
+def save_atomically(filepath, write):
+    """Call write(tmp_path), then rename into place so a partial file is never served"""
+    # Unique per call: identical uploads map to the same filepath and may race
+    tmp_path = f'{filepath}.{secrets.token_hex(4)}.tmp'
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, filepath)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def copy_stream_to(stream, path):
+    """Write the rest of a file-like object to path"""
+    with open(path, 'wb') as f:
+        shutil.copyfileobj(stream, f)
+
+def upload_digest(stream, *options):
+    """Hex name for an upload, derived from its bytes and processing options"""
+    digest = hashlib.blake2b(repr(options).encode('utf-8'), digest_size=8)
+    for chunk in iter(lambda: stream.read(65536), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+def has_jpeg_metadata(image):
+    """True if a JPEG has any segment besides the JFIF header and Adobe color marker"""
+    # EXIF, XMP, IPTC, ICC and COM segments can carry personal data
+    return any((marker, data[:5]) not in JPEG_BARE_SEGMENTS for marker, data in image.applist)
+
+def process_uploaded_image(stream, filepath, crop_mode, max_width, max_height):
+    """Crop, resize and save an uploaded image as JPEG"""
+    from PIL import Image
+
+    # Close the source so decoder buffers are freed as soon as the JPEG is written
+    with Image.open(stream) as source:
+        image = source
+
+        # Keep the uploaded bytes of a fitting JPEG only if it carries no metadata to strip
+        if (image.format == 'JPEG' and image.mode in ('RGB', 'L')
+                and crop_mode not in ('square', 'center')
+                and image.width <= max_width and image.height <= max_height
+                and not has_jpeg_metadata(image)):
+            stream.seek(0)
+            save_atomically(filepath, lambda path: copy_stream_to(stream, path))
+            return
+
+        # Let libjpeg decode large JPEGs at a reduced DCT scale before cropping
+        if image.format == 'JPEG':
+            image.draft(image.mode, (max_width * 2, max_height * 2))
+
+        # Apply cropping based on mode
+        if crop_mode == 'square':
+            # Crop to square aspect ratio
+            min_dimension = min(image.width, image.height)
+            left = (image.width - min_dimension) // 2
+            top = (image.height - min_dimension) // 2
+            right = left + min_dimension
+            bottom = top + min_dimension
+            image = image.crop((left, top, right, bottom))
+        elif crop_mode == 'center':
+            # Crop to center with target aspect ratio, compared with integer cross-multiplication
+            current_span = image.width * max_height
+            target_span = image.height * max_width
+
+            if current_span > target_span:
+                # Image is wider, crop width
+                new_width = target_span // max_height
+                left = (image.width - new_width) // 2
+                image = image.crop((left, 0, left + new_width, image.height))
+            elif current_span < target_span:
+                # Image is taller, crop height
+                new_height = current_span // max_width
+                top = (image.height - new_height) // 2
+                image = image.crop((0, top, image.width, top + new_height))
+
+        # Resize while maintaining aspect ratio if needed
+        if image.width > max_width or image.height > max_height:
+            # reducing_gap shrinks large images cheaply before the final LANCZOS pass
+            image.thumbnail((max_width, max_height), Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+        # Convert to RGB if needed (for JPEG), flattening transparency onto white
+        if image.mode == 'P':
+            image = image.convert('RGBA')
+        if image.mode in ('RGBA', 'LA'):
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode not in ('RGB', 'L', 'CMYK'):
+            image = image.convert('RGB')
+
+        # Single-pass encode; an empty comment stops Pillow copying the source's COM segment
+        save_atomically(filepath, lambda path: image.save(path, 'JPEG', quality=85, comment=b''))
+
 @app.route('/admin/upload-image', methods=['POST'])
 @require_admin
 def admin_upload_image():
@@ -1914,57 +2459,23 @@ def admin_upload_image():
         error_response = {'error': {'message': 'No file selected'}} if is_ckeditor else {'error': 'No file selected'}
         return jsonify(error_response), 400
 
-    if file and file.filename and file.filename.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp')):
-        filename = secure_filename(file.filename)
-        filename = f"{uuid.uuid4()}_{filename}"
-        filepath = os.path.join('static/resources', filename)
-
+    if os.path.splitext(file.filename)[1].lower() in ALLOWED_IMAGE_EXTENSIONS:
         # Get crop and resize parameters
         crop_mode = request.form.get('crop_mode', 'smart')  # smart, center, square
         max_width = int(request.form.get('max_width', 800))
         max_height = int(request.form.get('max_height', 600))
 
         try:
-            image = Image.open(file.stream)
-
-            # Apply cropping based on mode
-            if crop_mode == 'square':
-                # Crop to square aspect ratio
-                min_dimension = min(image.width, image.height)
-                left = (image.width - min_dimension) // 2
-                top = (image.height - min_dimension) // 2
-                right = left + min_dimension
-                bottom = top + min_dimension
-                image = image.crop((left, top, right, bottom))
-            elif crop_mode == 'center':
-                # Crop to center with target aspect ratio
-                target_ratio = max_width / max_height
-                current_ratio = image.width / image.height
-
-                if current_ratio > target_ratio:
-                    # Image is wider, crop width
-                    new_width = int(image.height * target_ratio)
-                    left = (image.width - new_width) // 2
-                    image = image.crop((left, 0, left + new_width, image.height))
-                elif current_ratio < target_ratio:
-                    # Image is taller, crop height
-                    new_height = int(image.width / target_ratio)
-                    top = (image.height - new_height) // 2
-                    image = image.crop((0, top, image.width, top + new_height))
-
-            # Resize while maintaining aspect ratio if needed
-            if image.width > max_width or image.height > max_height:
-                image.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
-
-            # Convert to RGB if needed (for JPEG)
-            if image.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', image.size, (255, 255, 255))
-                if image.mode == 'P':
-                    image = image.convert('RGBA')
-                background.paste(image, mask=image.split()[-1] if 'A' in image.mode else None)
-                image = background
-
-            image.save(filepath, 'JPEG', quality=85, optimize=True)
+            # Name by content and options so a re-uploaded image reuses the existing file
+            filename = f"{upload_digest(file.stream, crop_mode, max_width, max_height)}.jpg"
+            filepath = os.path.join('static/resources', filename)
+            # Certificates no longer write here, so make sure the directory exists
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+
+            # Process on the CPU-sized image pool
+            if not os.path.exists(filepath):
+                image_executor.submit(process_uploaded_image, file.stream, filepath,
+                                      crop_mode, max_width, max_height).result()
 
             image_url = url_for('static', filename=f'resources/{filename}')
 
@@ -1983,43 +2494,62 @@ def admin_upload_image():
     error_response = {'error': {'message': 'Invalid file type'}} if is_ckeditor else {'error': 'Invalid file type'}
     return jsonify(error_response), 400
 
+class ZipChunkWriter:
+    """Write-only file object that collects zipfile output between yields"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+# Formats that are already compressed; deflating them again burns CPU for no gain
+PRECOMPRESSED_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.gif', '.webp', '.zip', '.mp4', '.pdf'})
+
+def iter_export_zip(paths):
+    """Yield a ZIP archive of paths piece by piece, one file at a time"""
+    import zipfile
+
+    # Write to an unseekable sink so the archive is never held whole; images are stored
+    writer = ZipChunkWriter()
+    with zipfile.ZipFile(writer, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zip_file:
+        for path in paths:
+            if os.path.splitext(path)[1].lower() in PRECOMPRESSED_EXTENSIONS:
+                zip_file.write(path, path, compress_type=zipfile.ZIP_STORED)
+            else:
+                zip_file.write(path, path)
+            yield writer.drain()
+    yield writer.drain()  # central directory
+
 @app.route('/admin/export')
 @require_admin
 def admin_export_data():
-    import zipfile
-    import io
-
-    # Create ZIP file in memory
-    zip_buffer = io.BytesIO()
-
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        # Export configuration and data from database to JSON files for backup
-        # Note: Configuration and data are now stored in SQLite database
-        # This export creates temporary JSON files for backup compatibility
-
-        # Add module content files
-        module_dir = 'data/modules'
-        if os.path.exists(module_dir):
-            for filename in os.listdir(module_dir):
-                filepath = os.path.join(module_dir, filename)
-                if os.path.isfile(filepath):
-                    zip_file.write(filepath, filepath)
-
-        # Add static resources
-        resources_dir = 'static/resources'
-        if os.path.exists(resources_dir):
-            for filename in os.listdir(resources_dir):
-                filepath = os.path.join(resources_dir, filename)
-                if os.path.isfile(filepath):
-                    zip_file.write(filepath, filepath)
-
-    zip_buffer.seek(0)
-
-    return send_file(
-        io.BytesIO(zip_buffer.read()),
+    # Export configuration and data from database to JSON files for backup
+    # Note: Configuration and data are now stored in SQLite database
+    # This export creates temporary JSON files for backup compatibility
+
+    # Add module content files and static resources, skipping symlinks
+    paths = []
+    for directory in ('data/modules', 'static/resources'):
+        if os.path.exists(directory):
+            with os.scandir(directory) as entries:
+                paths.extend(entry.path for entry in entries if entry.is_file(follow_symlinks=False))
+
+    # Stream the archive as each file is compressed
+    filename = f'tutorial_platform_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.zip'
+    return Response(
+        iter_export_zip(paths),
         mimetype='application/zip',
-        as_attachment=True,
-        download_name=f'tutorial_platform_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.zip'
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
     )
 
 # Certificate template management routes
@@ -2027,11 +2557,36 @@ def admin_export_data():
 @require_admin
 def admin_certificate_templates():
     templates = get_certificate_templates()
-    config = load_config()
+    config = get_config()
     return render_template('admin/certificate_templates.html',
                          templates=templates,
                          config=config)
 
+# Certificate template form fields and their defaults, shared by create and edit
+TEMPLATE_FORM_TEXT_FIELDS = (
+    ('name', None), ('title', None), ('subtitle', None),
+    ('header_text', ''), ('footer_text', ''), ('company_name', ''), ('logo_url', ''),
+    ('signature_url', ''), ('signature_name', ''), ('signature_title', ''),
+    ('background_color', '#FFFFFF'), ('text_color', '#000000'),
+)
+TEMPLATE_FORM_INT_FIELDS = (
+    ('font_size_title', 24), ('font_size_subtitle', 16), ('font_size_module', 20),
+    ('font_size_date', 12), ('font_size_header', 14), ('font_size_footer', 10),
+    ('font_size_signature', 12), ('font_size_completion', 20),
+    ('margin_top', 100), ('margin_subtitle', 200), ('margin_module', 250), ('margin_date', 350),
+    ('margin_footer', 400), ('margin_signature', 420), ('margin_completion', 300),
+    ('logo_width', 100), ('logo_height', 50), ('signature_width', 150), ('signature_height', 40),
+)
+
+def certificate_template_from_form(form):
+    """Build a certificate template dict from the create/edit form"""
+    # One plain-dict snapshot instead of ~30 MultiDict lookups
+    values = form.to_dict()
+    template_data = {field: values.get(field, default) for field, default in TEMPLATE_FORM_TEXT_FIELDS}
+    template_data.update((field, int(values.get(field, default))) for field, default in TEMPLATE_FORM_INT_FIELDS)
+    template_data['is_default'] = bool(values.get('is_default'))
+    return template_data
+
 @app.route('/admin/certificate-template/new', methods=['GET', 'POST'])
 @require_admin
 def admin_new_certificate_template():
@@ -2040,40 +2595,7 @@ def admin_new_certificate_template():
             flash('Invalid CSRF token', 'error')
             return redirect(url_for('admin_new_certificate_template'))
 
-        template_data = {
-            'name': request.form.get('name'),
-            'title': request.form.get('title'),
-            'subtitle': request.form.get('subtitle'),
-            'header_text': request.form.get('header_text', ''),
-            'footer_text': request.form.get('footer_text', ''),
-            'company_name': request.form.get('company_name', ''),
-            'logo_url': request.form.get('logo_url', ''),
-            'signature_url': request.form.get('signature_url', ''),
-            'signature_name': request.form.get('signature_name', ''),
-            'signature_title': request.form.get('signature_title', ''),
-            'font_size_title': int(request.form.get('font_size_title', 24)),
-            'font_size_subtitle': int(request.form.get('font_size_subtitle', 16)),
-            'font_size_module': int(request.form.get('font_size_module', 20)),
-            'font_size_date': int(request.form.get('font_size_date', 12)),
-            'font_size_header': int(request.form.get('font_size_header', 14)),
-            'font_size_footer': int(request.form.get('font_size_footer', 10)),
-            'font_size_signature': int(request.form.get('font_size_signature', 12)),
-            'font_size_completion': int(request.form.get('font_size_completion', 20)), # New
-            'margin_top': int(request.form.get('margin_top', 100)),
-            'margin_subtitle': int(request.form.get('margin_subtitle', 200)),
-            'margin_module': int(request.form.get('margin_module', 250)),
-            'margin_date': int(request.form.get('margin_date', 350)),
-            'margin_footer': int(request.form.get('margin_footer', 400)),
-            'margin_signature': int(request.form.get('margin_signature', 420)),
-            'margin_completion': int(request.form.get('margin_completion', 300)), # New
-            'logo_width': int(request.form.get('logo_width', 100)),
-            'logo_height': int(request.form.get('logo_height', 50)),
-            'signature_width': int(request.form.get('signature_width', 150)),
-            'signature_height': int(request.form.get('signature_height', 40)),
-            'background_color': request.form.get('background_color', '#FFFFFF'),
-            'text_color': request.form.get('text_color', '#000000'),
-            'is_default': bool(request.form.get('is_default'))
-        }
+        template_data = certificate_template_from_form(request.form)
 
         if not template_data['name'] or not template_data['title']:
             flash('Name and title are required', 'error')
@@ -2083,7 +2605,7 @@ def admin_new_certificate_template():
         flash('Certificate template created successfully', 'success')
         return redirect(url_for('admin_certificate_templates'))
 
-    config = load_config()
+    config = get_config()
     return render_template('admin/certificate_template_form.html',
                          config=config,
                          template=None,
@@ -2103,41 +2625,8 @@ def admin_edit_certificate_template(template_id):
             flash('Invalid CSRF token', 'error')
             return redirect(url_for('admin_edit_certificate_template', template_id=template_id))
 
-        template_data = {
-            'id': template_id,
-            'name': request.form.get('name'),
-            'title': request.form.get('title'),
-            'subtitle': request.form.get('subtitle'),
-            'header_text': request.form.get('header_text', ''),
-            'footer_text': request.form.get('footer_text', ''),
-            'company_name': request.form.get('company_name', ''),
-            'logo_url': request.form.get('logo_url', ''),
-            'signature_url': request.form.get('signature_url', ''),
-            'signature_name': request.form.get('signature_name', ''),
-            'signature_title': request.form.get('signature_title', ''),
-            'font_size_title': int(request.form.get('font_size_title', 24)),
-            'font_size_subtitle': int(request.form.get('font_size_subtitle', 16)),
-            'font_size_module': int(request.form.get('font_size_module', 20)),
-            'font_size_date': int(request.form.get('font_size_date', 12)),
-            'font_size_header': int(request.form.get('font_size_header', 14)),
-            'font_size_footer': int(request.form.get('font_size_footer', 10)),
-            'font_size_signature': int(request.form.get('font_size_signature', 12)),
-            'font_size_completion': int(request.form.get('font_size_completion', 20)), # New
-            'margin_top': int(request.form.get('margin_top', 100)),
-            'margin_subtitle': int(request.form.get('margin_subtitle', 200)),
-            'margin_module': int(request.form.get('margin_module', 250)),
-            'margin_date': int(request.form.get('margin_date', 350)),
-            'margin_footer': int(request.form.get('margin_footer', 400)),
-            'margin_signature': int(request.form.get('margin_signature', 420)),
-            'margin_completion': int(request.form.get('margin_completion', 300)), # New
-            'logo_width': int(request.form.get('logo_width', 100)),
-            'logo_height': int(request.form.get('logo_height', 50)),
-            'signature_width': int(request.form.get('signature_width', 150)),
-            'signature_height': int(request.form.get('signature_height', 40)),
-            'background_color': request.form.get('background_color', '#FFFFFF'),
-            'text_color': request.form.get('text_color', '#000000'),
-            'is_default': bool(request.form.get('is_default'))
-        }
+        template_data = certificate_template_from_form(request.form)
+        template_data['id'] = template_id
 
         if not template_data['name'] or not template_data['title']:
             flash('Name and title are required', 'error')
@@ -2147,7 +2636,7 @@ def admin_edit_certificate_template(template_id):
         flash('Certificate template updated successfully', 'success')
         return redirect(url_for('admin_certificate_templates'))
 
-    config = load_config()
+    config = get_config()
     return render_template('admin/certificate_template_form.html',
                          config=config,
                          template=template,
@@ -2184,4 +2673,4 @@ def admin_set_default_certificate_template(template_id):
     return jsonify({'success': True})
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5000, debug=os.environ.get('FLASK_DEBUG') == '1', threaded=True)
\ No newline at end of file
@@ -0,0 +1,20 @@
+"""
+Gunicorn settings for the production deployment (picked up automatically from the working directory)
+"""
+
+import multiprocessing
+import os
+
+# Scraping and AI quiz generation are network-bound, so threaded workers
+# keep requests flowing while others wait on upstream responses
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+timeout = 60
+keepalive = 5
+
+# Import the app once in the master: schema setup, the JSON migration and the
+# default certificate template run a single time, and workers inherit the
+# loaded modules copy-on-write. Database connections are per process and are
+# reopened in each worker after the fork
+preload_app = True
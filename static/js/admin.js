@@ -90,6 +90,9 @@ class AdminPanel {
                 this.hideMessage(messageEl);
                 // Create modal to show imported content
                 this.showImportPreview(data);
+                if (data.quiz_job) {
+                    this.pollQuizJob(data.quiz_job);
+                }
             } else {
                 this.showMessage(messageEl, 'Error importing content: ' + data.error, 'danger');
             }
@@ -124,19 +127,9 @@ class AdminPanel {
                                         ${data.content.substring(0, 1000)}${data.content.length > 1000 ? '...' : ''}
                                     </div>
                                 </div>
-                                ${data.quiz_questions.length > 0 ? `
-                                <div class="mb-3">
-                                    <label class="form-label">Generated Quiz Questions</label>
-                                    <div class="border p-3" style="max-height: 200px; overflow-y: auto;">
-                                        ${data.quiz_questions.map((q, i) => `
-                                            <div class="mb-2">
-                                                <strong>Q${i+1}:</strong> ${q.question}<br>
-                                                <small>Options: ${q.options.join(', ')}</small>
-                                            </div>
-                                        `).join('')}
-                                    </div>
+                                <div id="importQuizPreview">
+                                    ${data.quiz_job ? '<p class="text-muted small">Generating quiz questions...</p>' : this.renderQuizPreview(data.quiz_questions)}
                                 </div>
-                                ` : ''}
                                 <input type="hidden" name="content" value="${this.escapeHtml(data.content)}">
                                 <input type="hidden" name="quiz_questions" value="${this.escapeHtml(JSON.stringify(data.quiz_questions))}">
                             </form>
@@ -160,6 +153,51 @@ class AdminPanel {
         });
     }
 
+    renderQuizPreview(questions) {
+        if (!questions || questions.length === 0) {
+            return '';
+        }
+        return `
+            <div class="mb-3">
+                <label class="form-label">Generated Quiz Questions</label>
+                <div class="border p-3" style="max-height: 200px; overflow-y: auto;">
+                    ${questions.map((q, i) => `
+                        <div class="mb-2">
+                            <strong>Q${i+1}:</strong> ${q.question}<br>
+                            <small>Options: ${q.options.join(', ')}</small>
+                        </div>
+                    `).join('')}
+                </div>
+            </div>
+        `;
+    }
+
+    async pollQuizJob(jobId) {
+        // Quiz questions are generated in the background; poll until they're ready
+        // or the preview is closed
+        while (document.getElementById('importQuizPreview')) {
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            try {
+                const response = await fetch(`/api/quiz-job/${encodeURIComponent(jobId)}`);
+                const data = await response.json();
+                if (!response.ok || data.done) {
+                    const questions = (response.ok && data.quiz_questions) || [];
+                    const preview = document.getElementById('importQuizPreview');
+                    const input = document.querySelector('#importContentForm input[name="quiz_questions"]');
+                    if (preview) {
+                        preview.innerHTML = this.renderQuizPreview(questions);
+                    }
+                    if (input) {
+                        input.value = JSON.stringify(questions);
+                    }
+                    return;
+                }
+            } catch (error) {
+                return;
+            }
+        }
+    }
+
     async handleImageUpload(e) {
         e.preventDefault();
         const formData = new FormData(e.target);
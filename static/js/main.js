@@ -163,23 +163,25 @@ class TutorialPlatform {
         if (!form) return;
 
         const formData = new FormData(form);
-        const answers = {};
+        // Positional array: radio names are question indexes, unanswered ones serialize as null
+        const answers = [];
 
         for (let [key, value] of formData.entries()) {
-            answers[key] = value;
+            answers[Number(key)] = value;
         }
 
-        fetch('/api/quiz-submit', {
+        this.getCSRFToken()
+        .then(token => fetch('/api/quiz-submit', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
-                'X-CSRF-Token': this.getCSRFToken()
+                'X-CSRF-Token': token
             },
             body: JSON.stringify({
                 module_id: moduleId,
                 answers: answers
             })
-        })
+        }))
         .then(response => response.json())
         .then(data => {
             this.displayQuizResults(data);
@@ -240,7 +242,17 @@ class TutorialPlatform {
     }
 
     getCSRFToken() {
-        return document.querySelector('meta[name="csrf-token"]')?.content || '';
+        // Pages don't embed a token by default; fetch one on first use and reuse it
+        const token = this.csrfToken || document.querySelector('meta[name="csrf-token"]')?.content;
+        if (token) {
+            return Promise.resolve(token);
+        }
+        return fetch('/api/csrf-token', { credentials: 'same-origin' })
+            .then(response => response.json())
+            .then(data => {
+                this.csrfToken = data.csrf_token;
+                return this.csrfToken;
+            });
     }
 
     